@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+상세 차트의 "가까운 b가격" 선택 마이크로 벤치마크
+
+  pandas      : 기존 방식 (범위 필터 → copy → |b가격-현재가| 계산 → 정렬 → 앞에서 k 개)
+  searchsorted: core.b_index.price_range + nearest_k (정렬된 NumPy 배열)
+
+실행: python -m bench.nearest_b [--repeat 200]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.b_index import nearest_k, price_range
+
+B_COUNTS = (10, 1_000, 5_000, 20_000)
+
+
+def select_pandas(df_b, current_price, y_min, y_max, k):
+    visible = df_b[(df_b["b가격"] >= y_min) & (df_b["b가격"] <= y_max)].copy()
+    visible["diff"] = (visible["b가격"] - current_price).abs()
+    visible = visible.sort_values("diff").reset_index(drop=True)
+    return visible.head(k)["b가격"].to_numpy()
+
+
+def select_searchsorted(b_prices, current_price, y_min, y_max, k):
+    return nearest_k(price_range(b_prices, y_min, y_max), current_price, k)
+
+
+def per_call_us(fn, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'b-points':>9} | {'k':>2} | {'pandas':>10} | {'searchsorted':>12} | speedup")
+    for n in B_COUNTS:
+        b_prices = np.sort(rng.uniform(1_000, 100_000, n).round())
+        df_b = pd.DataFrame({"b가격": b_prices})
+        current, y_min, y_max = 52_345.0, 20_000.0, 90_000.0
+
+        for k in (1, 3):
+            expected = np.sort(select_pandas(df_b, current, y_min, y_max, k))
+            got = select_searchsorted(b_prices, current, y_min, y_max, k)
+            # 같은 거리(동률)가 아니라면 같은 집합이어야 한다
+            assert np.allclose(np.abs(expected - current).max(), np.abs(got - current).max())
+
+            old = per_call_us(lambda: select_pandas(df_b, current, y_min, y_max, k), args.repeat)
+            new = per_call_us(lambda: select_searchsorted(b_prices, current, y_min, y_max, k), args.repeat)
+            print(f"{n:>9,} | {k:>2} | {old:>8.1f}us | {new:>10.1f}us | {old / new:>6.0f}x")
+
+
+if __name__ == "__main__":
+    main()
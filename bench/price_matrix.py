@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+전 종목 종가 행렬 만들기 벤치마크 (로컬 SQLite 대체본 사용)
+
+  per-code : 종목마다 fetch_price_rows 를 차례로 호출 → DataFrame 이어 붙이고 pivot
+  bulk     : core.price_matrix.build (.in_() 묶음 요청 동시 실행 → float32 행렬)
+  ※ SQLite 대체본은 쿼리를 직렬로 처리하므로 네트워크 병렬 이득은 여기서 보이지 않는다.
+    차이는 요청 수(종목 수 → 행 수 / PAGE_SIZE)와 조립 비용에서 나온다.
+
+실행: python -m bench.price_matrix [--stocks 500] [--days 750]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from core import db, price_matrix
+from core.standin import SqliteBackend, seed_demo
+
+
+def per_code(codes):
+    frames = []
+    for code in codes:
+        df = pd.DataFrame(db.fetch_price_rows(code))
+        df["종목코드"] = code
+        frames.append(df)
+    df = pd.concat(frames, ignore_index=True)
+    return df.pivot(index="날짜", columns="종목코드", values="종가")
+
+
+class CountingBackend(SqliteBackend):
+    """execute 된 SELECT 수 세기 (count 쿼리 포함)"""
+
+    requests = 0
+
+    def query(self, sql, params=(), as_dict=False):
+        CountingBackend.requests += 1
+        return super().query(sql, params, as_dict)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stocks", type=int, default=500)
+    parser.add_argument("--days", type=int, default=750)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        seed_demo(SqliteBackend(path), n_stocks=args.stocks, n_days=args.days, b_per_stock=1, n_months=1)
+        db.set_backend(CountingBackend(path))
+        price_matrix.MATRIX_DIR = os.path.join(tmp, "matrix")
+        codes = price_matrix.all_codes()
+
+        CountingBackend.requests = 0
+        t0 = time.perf_counter()
+        old = per_code(codes)
+        t_old, n_old = time.perf_counter() - t0, CountingBackend.requests
+
+        CountingBackend.requests = 0
+        t0 = time.perf_counter()
+        matrix = price_matrix.build(codes)
+        t_new, n_new = time.perf_counter() - t0, CountingBackend.requests
+
+        assert np.allclose(old.to_numpy(dtype=np.float32), matrix.closes, equal_nan=True)
+
+        t0 = time.perf_counter()
+        reopened = price_matrix.read()
+        t_open = time.perf_counter() - t0
+
+        print(f"{args.stocks} stocks x {args.days} days = {args.stocks * args.days:,} rows")
+        print(f"per-code : {t_old:8.2f}s  {n_old:>6,} 요청  (종목별 순차 조회 + pivot, float64 {old.to_numpy().nbytes / 1e6:.1f}MB)")
+        print(f"bulk     : {t_new:8.2f}s  {n_new:>6,} 요청  (float32 {matrix.nbytes / 1e6:.1f}MB)  {t_old / t_new:.1f}x")
+        print(f"mmap open: {t_open * 1e3:8.2f}ms ({type(reopened.closes).__name__})")
+
+
+if __name__ == "__main__":
+    main()
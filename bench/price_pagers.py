@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+prices 페이지 조회 방식 비교 벤치마크 (로컬 SQLite 대체본 사용)
+
+  offset  : .range(start, end) 반복 (기존 방식, OFFSET 스캔)
+  keyset  : .gt("날짜", 마지막날짜) 커서 반복
+  windows : 날짜 구간별 keyset 을 동시에 실행 (core.db.fetch_price_rows)
+            ※ SQLite 대체본은 쿼리를 직렬로 처리하므로 네트워크 병렬 이득은 여기서 보이지 않는다.
+
+실행: python -m bench.price_pagers [--page-size 1000] [--repeat 3]
+"""
+import argparse
+import time
+from datetime import date, timedelta
+
+from core import db
+from core.standin import SqliteBackend
+
+ROW_COUNTS = (1_000, 10_000, 100_000)
+STOCKS = 3
+
+
+def build_backend(rows_per_stock):
+    backend = SqliteBackend()
+    start = date(1700, 1, 1)
+    dates = [(start + timedelta(days=i)).isoformat() for i in range(rows_per_stock)]
+    for s in range(STOCKS):
+        code = f"{s:06d}"
+        backend.insert_rows(
+            "prices",
+            ({"종목코드": code, "날짜": d, "종가": 10_000 + i % 500} for i, d in enumerate(dates)),
+        )
+    backend.create_index("prices", "종목코드", "날짜")
+    return backend
+
+
+def timed(fn, repeat):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--page-size", type=int, default=db.PAGE_SIZE)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pagers = {
+        "offset": lambda code: db.fetch_price_rows_offset(code, page_size=args.page_size),
+        "keyset": lambda code: db.fetch_price_rows_keyset(code, page_size=args.page_size),
+        "windows": lambda code: db.fetch_price_rows(code, page_size=args.page_size),
+    }
+
+    print(f"page_size={args.page_size}, repeat={args.repeat} (best of)")
+    print(f"{'rows/stock':>10} | " + " | ".join(f"{name:>10}" for name in pagers))
+    for n in ROW_COUNTS:
+        db.set_backend(build_backend(n))
+        code = f"{STOCKS - 1:06d}"
+        times, results = [], []
+        for fn in pagers.values():
+            elapsed, rows = timed(lambda: fn(code), args.repeat)
+            times.append(elapsed)
+            results.append(rows)
+        assert all(r == results[0] for r in results), "pager results differ"
+        assert len(results[0]) == n
+        print(f"{n:>10,} | " + " | ".join(f"{t * 1000:>8.1f}ms" for t in times))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+동시 세션 수에 따른 메모리(RSS) 비교 벤치마크 (로컬 SQLite 대체본 사용)
+
+세션 N 개가 동시에 같은 페이지 데이터(total_return, b_return, 월별 추적, 인기 종목 가격)를 들고 있는 상황:
+  cache_data : 기존 방식 — st.cache_data 가 호출마다 unpickle 한 복사본을 돌려준다
+  snapshot   : core.snapshots — st.cache_resource 한 벌을 얕은 복사본(view)으로 공유
+모드마다 새 프로세스에서 측정한다.
+
+실행: python -m bench.session_rss [--sessions 50] [--stocks 2000]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+from core.standin import SqliteBackend, seed_demo
+
+HOT_CODES = 5
+
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+
+def run_child(mode, sessions):
+    import gc
+
+    from core import db, snapshots
+
+    loaders = [
+        (db.load_total_return, (), {}),
+        (db.load_b_return, (), {"limit": 1000}),
+        (db.load_monthly_tracking, (), {}),
+    ] + [(db.load_prices, (f"{i:06d}", "D"), {}) for i in range(HOT_CODES)]
+
+    def page_data():
+        if mode == "snapshot":
+            return [snapshots.get(fn, *args, **kwargs) for fn, args, kwargs in loaders]
+        return [fn(*args, **kwargs) for fn, args, kwargs in loaders]
+
+    page_data()  # 캐시 채우기
+    gc.collect()
+    base = rss_mb()
+    held = [page_data() for _ in range(sessions)]
+    gc.collect()
+    total = rss_mb() - base
+    print(f"{mode:>10} | {sessions:>8} | {base:>9.1f}MB | {total:>9.1f}MB | {total / sessions * 1000:>9.0f}KB")
+    return held
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--stocks", type=int, default=2000)
+    parser.add_argument("--child", choices=["cache_data", "snapshot"])
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.sessions)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        seed_demo(SqliteBackend(path), n_stocks=args.stocks, n_days=2600, b_per_stock=4, n_months=24)
+        env = dict(
+            os.environ, DATA_BACKEND="sqlite", SQLITE_PATH=path,
+            DISK_CACHE_PATH="", PRICE_STORE_DIR="", CACHE_REFRESH="0",
+        )
+        print(f"{'mode':>10} | {'sessions':>8} | {'cache RSS':>11} | {'sessions +':>11} | {'/session':>11}")
+        for mode in ("cache_data", "snapshot"):
+            subprocess.run(
+                [sys.executable, "-m", "bench.session_rss", "--child", mode, "--sessions", str(args.sessions)],
+                env=env, check=True, stderr=subprocess.DEVNULL,
+            )
+
+
+if __name__ == "__main__":
+    main()
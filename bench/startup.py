@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+콜드 스타트 벤치마크 (로컬 SQLite 대체본 사용)
+
+  import : 새 프로세스에서 `python -X importtime` 으로 header + core.db 를 불러오는 시간과 패키지별 시간
+  render : 페이지마다 새 프로세스에서 첫 실행(AppTest.run) 시간과, 그때 불러온 무거운 모듈
+           (plotly 는 streamlit 이 설치만 돼 있으면 스스로 불러오고, st.line_chart 는 altair 를 쓴다)
+기준(--import-budget-ms, --render-budget-ms)을 넘거나 header 가 무거운 모듈을 불러오면 종료 코드 1.
+
+실행: python -m bench.startup [--stocks 200] [--pages "pages/전체 종목.py" ...]
+"""
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from core.standin import SqliteBackend, seed_demo
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 화면을 그릴 때만 필요한 모듈 (header / core 는 이것들을 top-level 에서 import 하면 안 된다)
+HEAVY = ["supabase", "st_aggrid", "altair", "plotly", "matplotlib"]
+BASE_IMPORTS = "import header, core.db"
+
+
+def import_times(env):
+    """(전체 ms, [(패키지, 자체 시간 합 ms)] 느린 순)"""
+    res = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", BASE_IMPORTS],
+        env=env, cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    total, by_package = 0.0, {}
+    for line in res.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue
+        package = name.strip().split(".")[0]
+        by_package[package] = by_package.get(package, 0.0) + int(self_us) / 1000
+        if not name.startswith("  "):
+            total += int(cumulative) / 1000
+    return total, sorted(by_package.items(), key=lambda x: -x[1])
+
+
+def heavy_in_header(env):
+    """header / core 가 직접 불러온 무거운 모듈 (streamlit 자체가 불러오는 것은 제외)"""
+    code = (
+        "import sys; import streamlit, pandas; before = set(sys.modules); "
+        f"{BASE_IMPORTS}; print([m for m in {HEAVY!r} if m in sys.modules and m not in before])"
+    )
+    res = subprocess.run([sys.executable, "-c", code], env=env, cwd=ROOT, capture_output=True, text=True, check=True)
+    return res.stdout.strip()
+
+
+def run_child(page):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(ROOT, page), default_timeout=120)
+    at.session_state["selected_stock_code"] = "000003"
+    at.session_state["selected_stock_name"] = "종목003"
+    t = time.perf_counter()
+    at.run()
+    ms = (time.perf_counter() - t) * 1000
+    errors = [str(e.value) for e in at.error] + [str(x.value)[:200] for x in at.exception]
+    print(json.dumps({"ms": ms, "heavy": [m for m in HEAVY if m in sys.modules], "errors": errors}, ensure_ascii=False))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stocks", type=int, default=200)
+    parser.add_argument("--pages", nargs="*")
+    parser.add_argument("--import-budget-ms", type=float, default=float(os.environ.get("STARTUP_IMPORT_BUDGET_MS", "1500")))
+    parser.add_argument("--render-budget-ms", type=float, default=float(os.environ.get("STARTUP_RENDER_BUDGET_MS", "3000")))
+    parser.add_argument("--top", type=int, default=8)
+    parser.add_argument("--child")
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child)
+        return
+
+    os.chdir(ROOT)
+    pages = args.pages or ["스윙 종목.py"] + sorted(glob.glob("pages/*.py"))
+    failed = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        seed_demo(SqliteBackend(path), n_stocks=args.stocks, n_days=750)
+        # 디스크 캐시 / 가격 저장소 / 백그라운드 갱신 없이 순수 콜드 스타트
+        env = dict(
+            os.environ, DATA_BACKEND="sqlite", SQLITE_PATH=path, PYTHONPATH=ROOT,
+            DISK_CACHE_PATH="", PRICE_STORE_DIR="", CACHE_REFRESH="0", PREFETCH_TOP_N="0",
+        )
+
+        total, top = import_times(env)
+        print(f"[import] {BASE_IMPORTS}: {total:.0f}ms (기준 {args.import_budget_ms:.0f}ms)")
+        for name, ms in top[:args.top]:
+            print(f"  {name:<40} {ms:>8.1f}ms")
+        heavy = heavy_in_header(env)
+        print(f"  무거운 모듈: {heavy}")
+        if total > args.import_budget_ms:
+            failed.append(f"import {total:.0f}ms")
+        if heavy != "[]":
+            failed.append(f"header/core 가 불러온 모듈 {heavy}")
+
+        print(f"\n[render] {'page':<28} | {'first run':>10} | heavy imports")
+        for page in pages:
+            res = subprocess.run(
+                [sys.executable, "-m", "bench.startup", "--child", page],
+                env=env, cwd=ROOT, capture_output=True, text=True, check=True,
+            )
+            out = json.loads(res.stdout.strip().splitlines()[-1])
+            print(f"         {page:<28} | {out['ms']:>8.0f}ms | {', '.join(out['heavy']) or '-'}")
+            if out["errors"]:
+                failed.append(f"{page} 오류 {out['errors']}")
+            if out["ms"] > args.render_budget_ms:
+                failed.append(f"{page} {out['ms']:.0f}ms")
+
+    if failed:
+        print("\n❌ 기준 초과: " + "; ".join(failed))
+        sys.exit(1)
+    print(f"\n✅ 기준 이내 (import ≤ {args.import_budget_ms:.0f}ms, 페이지 첫 실행 ≤ {args.render_budget_ms:.0f}ms)")
+
+
+if __name__ == "__main__":
+    main()
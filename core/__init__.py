@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+# 페이지 스크립트들이 공통으로 사용하는 데이터 접근 / 계산 모듈 모음
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+b가격 인메모리 색인.
+
+데이터가 바뀔 때마다 한 번만 만들고 (st.cache_resource 로 모든 세션이 공유),
+이후 "b가격 ±X% 이내 종목" / "현재가 바로 아래·위 b가격" 조회는 searchsorted 한 번으로 끝낸다.
+"""
+import threading
+import time
+from functools import partial
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from core import db, disk_cache, page_data, versions
+
+TABLES = ("bt_points", "total_return")
+
+_latest = None  # (만든 시각, 데이터 버전, BPriceIndex)
+_latest_lock = threading.Lock()
+
+
+class BPriceIndex:
+    """
+    - 종목별 b가격 오름차순 배열 (하나의 큰 배열 + 종목별 구간)
+    - 전체 (종목, b가격) 쌍을 현재가 대비 |변동률| 오름차순으로 정렬한 배열
+    """
+
+    def __init__(self, df_b, df_t):
+        if df_b.empty:
+            df_b = pd.DataFrame(columns=["종목코드", "b가격"])
+        if df_t.empty:
+            df_t = pd.DataFrame(columns=["종목명", "종목코드", "현재가격"])
+
+        b = df_b[["종목코드", "b가격"]].dropna()
+        b = b[b["b가격"] > 0].astype({"종목코드": str, "b가격": float})
+        b = b.sort_values(["종목코드", "b가격"], kind="stable")
+
+        codes = b["종목코드"].to_numpy()
+        self._prices = b["b가격"].to_numpy()
+        self._prices.setflags(write=False)
+
+        uniq, starts = np.unique(codes, return_index=True)
+        ends = np.append(starts[1:], len(codes))
+        self._slices = {code: (s, e) for code, s, e in zip(uniq, starts, ends)}
+
+        # 현재가 대비 변동률 → |변동률| 기준 정렬
+        t = df_t.astype({"종목코드": str}).drop_duplicates("종목코드").set_index("종목코드")
+        current = t["현재가격"].astype(float).reindex(codes).to_numpy()
+        names = t["종목명"].reindex(codes).to_numpy() if "종목명" in t.columns else codes
+        valid = ~np.isnan(current)
+
+        change = (current[valid] - self._prices[valid]) / self._prices[valid] * 100
+        order = np.argsort(np.abs(change), kind="stable")
+        self._band_key = np.abs(change)[order]
+        self._band_frame = pd.DataFrame({
+            "종목명": names[valid][order],
+            "종목코드": codes[valid][order],
+            "b가격": self._prices[valid][order],
+            "현재가격": current[valid][order],
+            "변동률": change[order].round(2),
+        })
+
+    def __len__(self):
+        return len(self._prices)
+
+    # ------------------------------------------------
+    # 밴드 조회 (투자 적정 구간)
+    # ------------------------------------------------
+    def within(self, band_pct):
+        """현재가격이 b가격 ±band_pct% 이내인 (종목, b가격) 행, 변동률 오름차순"""
+        k = int(np.searchsorted(self._band_key, band_pct, side="right"))
+        return self._band_frame.iloc[:k].sort_values("변동률", kind="stable").reset_index(drop=True)
+
+    def count_within(self, band_pct):
+        return int(np.searchsorted(self._band_key, band_pct, side="right"))
+
+    # ------------------------------------------------
+    # 종목별 조회
+    # ------------------------------------------------
+    def b_prices(self, code):
+        """종목의 b가격 오름차순 배열 (읽기 전용 뷰, 없으면 빈 배열)"""
+        s, e = self._slices.get(str(code), (0, 0))
+        return self._prices[s:e]
+
+    def nearest(self, code, price):
+        """(price 이하 중 가장 가까운 b가격, price 초과 중 가장 가까운 b가격) — 없으면 None"""
+        return neighbors(self.b_prices(code), price)
+
+
+def neighbors(sorted_prices, price):
+    """오름차순 배열에서 price 바로 아래(이하)와 바로 위(초과) 값"""
+    i = int(np.searchsorted(sorted_prices, price, side="right"))
+    below = float(sorted_prices[i - 1]) if i > 0 else None
+    above = float(sorted_prices[i]) if i < len(sorted_prices) else None
+    return below, above
+
+
+def price_range(sorted_prices, low, high):
+    """오름차순 배열에서 low <= 값 <= high 인 구간 (복사 없는 슬라이스)"""
+    lo = int(np.searchsorted(sorted_prices, low, side="left"))
+    hi = int(np.searchsorted(sorted_prices, high, side="right"))
+    return sorted_prices[lo:hi]
+
+
+def nearest_k(sorted_prices, price, k):
+    """
+    오름차순 배열에서 price 와 가장 가까운 k 개 (가격 순서 그대로의 연속 구간).
+    searchsorted 로 삽입 위치를 찾고 양쪽으로 한 칸씩 넓혀 간다 → O(log n + k)
+    거리가 같으면 아래쪽 값을 먼저 고른다.
+    """
+    n = len(sorted_prices)
+    k = min(int(k), n)
+    if k <= 0:
+        return sorted_prices[:0]
+
+    hi = int(np.searchsorted(sorted_prices, price, side="left"))
+    lo = hi
+    while hi - lo < k:
+        if lo == 0:
+            hi += 1
+        elif hi == n:
+            lo -= 1
+        elif price - sorted_prices[lo - 1] <= sorted_prices[hi] - price:
+            lo -= 1
+        else:
+            hi += 1
+    return sorted_prices[lo:hi]
+
+
+def _current(loader, **kwargs):
+    """st.cache_data 와 디스크 캐시의 이전 버전을 거치지 않고 지금 버전의 테이블을 받는다"""
+    with disk_cache.current_only():
+        return loader.__wrapped__(**kwargs)
+
+
+def _cached(loader, **kwargs):
+    return loader(**kwargs)
+
+
+def _build(version, load):
+    global _latest
+    # 두 테이블을 동시에 받는다
+    data, errors = page_data.fetch({
+        "bt_points": (partial(load, db.load_bt_points, columns="종목코드, b가격"),),
+        "total_return": (partial(load, db.load_total_return, columns="종목명, 종목코드, 현재가격"),),
+    })
+    if errors:
+        raise next(iter(errors.values()))
+    index = BPriceIndex(data["bt_points"], data["total_return"])
+    with _latest_lock:
+        _latest = (time.monotonic(), version, index)
+    return index
+
+
+@st.cache_resource(ttl=versions.VERSIONED_TTL, max_entries=2, show_spinner=False)
+def _index_for_version(version):
+    return _build(version, _current)
+
+
+@st.cache_resource(ttl=db.CACHE_TTL, show_spinner=False)
+def _index_by_ttl():
+    return _build("", _cached)
+
+
+def get_b_index():
+    """
+    프로세스 전체가 공유하는 색인.
+    데이터 버전(data_versions)을 알면 버전마다 한 번만 만들고, 모르면 캐시가 만료될 때마다 다시 만든다.
+    """
+    version = versions.token(TABLES)
+    return _index_for_version(version) if version else _index_by_ttl()
+
+
+def stock_b_prices(code):
+    """
+    종목의 b가격 오름차순 배열.
+    색인이 이미 만들어져 있으면 거기서 바로 꺼내고, 아니면 해당 종목만 조회한다.
+    (상세 페이지 진입 때문에 전체 테이블을 받지는 않는다)
+    """
+    latest = _latest
+    if latest is not None:
+        built, version, index = latest
+        fresh = version == versions.token(TABLES) if version else time.monotonic() - built < db.CACHE_TTL
+        if fresh:
+            return index.b_prices(code)
+    df = db.load_bt_points(code, columns="b가격")
+    if df.empty:
+        return np.empty(0)
+    return df["b가격"].to_numpy()
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+차트용 시계열 가공 (브라우저로 보내는 점 개수 줄이기)
+
+- LTTB(Largest-Triangle-Three-Buckets) 다운샘플링
+- 최고/최저점, b가격 선과 만나는 점은 항상 남긴다
+- 주봉/월봉 집계와 기간에 맞는 해상도 선택
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+# 차트 한 개에 보낼 최대 점 개수 (대략 차트 가로 픽셀 수)
+CHART_MAX_POINTS = int(os.environ.get("CHART_MAX_POINTS", "1000"))
+
+
+def lttb_indices(x, y, budget):
+    """
+    LTTB 로 고른 점들의 인덱스 (오름차순, 첫 점과 마지막 점 포함).
+    x, y 는 같은 길이의 float 배열, x 는 오름차순.
+    """
+    n = len(y)
+    if budget >= n or budget < 3:
+        return np.arange(n)
+
+    # 첫/마지막 점을 뺀 나머지를 budget-2 개 구간으로 나눈다
+    edges = np.linspace(1, n - 1, budget - 1).astype(int)
+    selected = np.empty(budget, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    prev = 0
+    for i in range(budget - 2):
+        start, end = edges[i], edges[i + 1]
+        # 다음 구간의 평균점 (마지막 구간은 마지막 점)
+        if i + 2 < len(edges):
+            nxt_start, nxt_end = edges[i + 1], edges[i + 2]
+            avg_x = x[nxt_start:nxt_end].mean()
+            avg_y = y[nxt_start:nxt_end].mean()
+        else:
+            avg_x, avg_y = x[n - 1], y[n - 1]
+
+        # 이전 선택점 - 후보점 - 다음 구간 평균점 이 만드는 삼각형 넓이가 가장 큰 점
+        area = np.abs(
+            (x[prev] - avg_x) * (y[start:end] - y[prev])
+            - (x[prev] - x[start:end]) * (avg_y - y[prev])
+        )
+        prev = start + int(area.argmax())
+        selected[i + 1] = prev
+    return selected
+
+
+def crossing_indices(y, levels):
+    """y 가 각 level 을 지나거나 닿는 구간의 양 끝점 인덱스 (선이 level 을 넘는 모양이 그대로 남는다)"""
+    if len(y) < 2 or len(levels) == 0:
+        return np.empty(0, dtype=np.int64)
+    found = []
+    for level in levels:
+        d = y - level
+        cross = np.nonzero(d[:-1] * d[1:] <= 0)[0]
+        found.extend([cross, cross + 1])
+    return np.unique(np.concatenate(found))
+
+
+def downsample(df, max_points=CHART_MAX_POINTS, x="날짜", y="종가", keep_levels=()):
+    """
+    df 를 최대 max_points 개 정도로 줄인다 (원래 행을 골라내므로 값은 그대로).
+    최고/최저점과 keep_levels(b가격 선) 과 만나는 점은 항상 포함된다.
+    """
+    n = len(df)
+    if n <= max_points:
+        return df
+
+    xs = df[x].to_numpy()
+    xs = xs.astype("datetime64[ns]").astype(np.int64).astype(float) if xs.dtype.kind == "M" else xs.astype(float)
+    ys = df[y].to_numpy(dtype=float)
+
+    # b가격 교차점은 전체 예산의 1/4 까지만 (촘촘히 오가는 구간에서 점이 폭증하지 않게)
+    cross = crossing_indices(ys, np.asarray(keep_levels, dtype=float))
+    cross_budget = max_points // 4
+    if len(cross) > cross_budget:
+        cross = cross[np.linspace(0, len(cross) - 1, cross_budget).astype(int)]
+
+    keep = np.concatenate([
+        lttb_indices(xs, ys, max(3, max_points - len(cross) - 2)),
+        [int(ys.argmin()), int(ys.argmax())],
+        cross,
+    ])
+    return df.iloc[np.unique(keep)]
+
+
+# ------------------------------------------------
+# 주봉 / 월봉
+# ------------------------------------------------
+# 해상도 → pandas 기간 규칙 (주봉은 금요일 마감 기준)
+RESOLUTIONS = {"D": None, "W": "W-FRI", "M": "M"}
+OHLC_COLUMNS = ["날짜", "시가", "고가", "저가", "종가"]
+
+
+def resample_ohlc(df, resolution):
+    """
+    일별 종가(날짜 오름차순)를 주/월 단위 OHLC 로 집계한다.
+    날짜는 그 기간의 마지막 거래일 (현재가와 차트 끝이 일치하도록).
+    """
+    rule = RESOLUTIONS[resolution]
+    if rule is None or df.empty:
+        return df
+    key = df["날짜"].dt.to_period(rule)
+    out = df.groupby(key, sort=True).agg(
+        날짜=("날짜", "last"),
+        시가=("종가", "first"),
+        고가=("종가", "max"),
+        저가=("종가", "min"),
+        종가=("종가", "last"),
+    )
+    return out.reset_index(drop=True)[OHLC_COLUMNS]
+
+
+def period_start(date, resolution):
+    """date 가 속한 주/월의 시작 시각 (증분 재집계 기준점)"""
+    return pd.Timestamp(date).to_period(RESOLUTIONS[resolution]).start_time
+
+
+def pick_resolution(start, end):
+    """보여줄 기간 길이에 맞는 해상도: 2년 이하 일봉, 10년 이하 주봉, 그 이상 월봉"""
+    days = (pd.Timestamp(end) - pd.Timestamp(start)).days
+    if days <= 366 * 2:
+        return "D"
+    if days <= 366 * 10:
+        return "W"
+    return "M"
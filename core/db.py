@@ -0,0 +1,509 @@
+# -*- coding: utf-8 -*-
+"""
+공통 데이터 접근 모듈.
+
+- 프로세스 당 하나의 Supabase 클라이언트(keep-alive 커넥션 풀)를 공유한다.
+- 테이블별 로더를 한 곳에 모아 모든 페이지가 같은 캐시를 쓰도록 한다.
+- 백엔드는 교체 가능 (DATA_BACKEND=sqlite 또는 set_backend()) → 테스트/벤치마크용 로컬 대체본
+- 테이블 로더 결과는 디스크 캐시(core.disk_cache)에도 저장되어 재시작/다른 프로세스와 공유된다
+- 모든 쿼리 실행은 core.metrics 로 계측된다 (테이블, 조건, 행 수, 크기, 지연 시간)
+"""
+import logging
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from functools import partial
+from typing import Optional
+
+import pandas as pd
+import streamlit as st
+
+from core import disk_cache, metrics, schema
+
+logger = logging.getLogger(__name__)
+
+CACHE_TTL = 300
+# 한 번에 받을 행 수 (Supabase max-rows 설정(기본 1000)보다 크면 안 된다)
+PAGE_SIZE = int(os.environ.get("DB_PAGE_SIZE", "1000"))
+
+# 커넥션 풀 설정 (Streamlit 세션들이 하나의 풀을 나눠 쓴다)
+POOL_SIZE = int(os.environ.get("SUPABASE_POOL_SIZE", "20"))
+KEEPALIVE_SECONDS = float(os.environ.get("SUPABASE_KEEPALIVE_SECONDS", "60"))
+HTTP_TIMEOUT = float(os.environ.get("SUPABASE_HTTP_TIMEOUT", "30"))
+
+# 구간 병렬 조회용 스레드 수 (프로세스 전체에서 공유하는 제한된 풀)
+FETCH_WORKERS = int(os.environ.get("DB_FETCH_WORKERS", "8"))
+
+# total_return / b_return / b_return_shoot 출처: "db" (테이블 그대로) 또는 "local" (core.rank_engine 으로 직접 계산)
+RANKINGS_SOURCE = os.environ.get("RANKINGS_SOURCE", "db")
+
+TOTAL_RETURN_COLUMNS = "종목코드, 종목명, 시작가격, 현재가격, 수익률"
+B_RETURN_COLUMNS = "종목명, 종목코드, 수익률, 발생일, 구분"
+MONTHLY_TRACKING_COLUMNS = (
+    "종목명, 종목코드, b가격, 측정일, 측정일종가, 현재가, "
+    "측정일대비수익률, 최고수익률, 최저수익률, 월구분"
+)
+
+_backend = None
+_backend_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="db-fetch")
+
+
+# ------------------------------------------------
+# 백엔드 (Supabase / 로컬 대체본)
+# ------------------------------------------------
+def _read_setting(name):
+    value = os.environ.get(name)
+    if value:
+        return value
+    try:
+        return st.secrets.get(name)
+    except Exception:
+        # secrets.toml 이 없는 환경 (로컬 스크립트, 벤치마크 등)
+        return None
+
+
+def _create_supabase_client():
+    import httpx
+    from supabase import ClientOptions, create_client
+
+    url = _read_setting("SUPABASE_URL")
+    key = _read_setting("SUPABASE_KEY")
+    if not url or not key:
+        raise RuntimeError("Supabase 환경변수(SUPABASE_URL, SUPABASE_KEY)가 설정되지 않았습니다.")
+
+    http_client = httpx.Client(
+        http2=True,
+        follow_redirects=True,
+        timeout=HTTP_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=POOL_SIZE,
+            max_keepalive_connections=POOL_SIZE,
+            keepalive_expiry=KEEPALIVE_SECONDS,
+        ),
+    )
+    return create_client(url, key, options=ClientOptions(httpx_client=http_client))
+
+
+def _create_backend():
+    kind = (os.environ.get("DATA_BACKEND") or "supabase").lower()
+    if kind == "sqlite":
+        from core.standin import SqliteBackend
+        return SqliteBackend(os.environ.get("SQLITE_PATH", ":memory:"))
+    return _create_supabase_client()
+
+
+def get_client():
+    """프로세스 전역 클라이언트 (처음 호출될 때 한 번만 생성)"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = metrics.instrument(_create_backend())
+    return _backend
+
+
+def set_backend(backend):
+    """
+    클라이언트를 교체한다. (테스트 / 벤치마크에서 SqliteBackend 등을 주입)
+    supabase 클라이언트와 같은 table().select()... 인터페이스만 있으면 된다.
+    """
+    global _backend
+    with _backend_lock:
+        _backend = metrics.instrument(backend)
+    st.cache_data.clear()
+    from core import versions
+    versions.reset()
+
+
+def backend_key():
+    """
+    현재 백엔드를 구분하는 짧은 문자열 (로컬 디스크 저장본의 이름공간으로 사용).
+    영속 저장할 수 없는 백엔드(메모리 SQLite 등)는 None.
+    """
+    client = get_client()
+    path = getattr(client, "path", None)
+    if path is not None:
+        if path == ":memory:":
+            return None
+        return "sqlite-" + "".join(ch if ch.isalnum() else "_" for ch in os.path.abspath(path))
+    url = getattr(client, "supabase_url", None)
+    if url:
+        from urllib.parse import urlparse
+        return "supabase-" + (urlparse(str(url)).hostname or "default")
+    return None
+
+
+def require_client():
+    """페이지 상단에서 호출: 연결할 수 없으면 에러를 표시하고 페이지를 중단한다."""
+    try:
+        return get_client()
+    except Exception as e:
+        st.error(f"❌ {e}")
+        st.stop()
+
+
+# ------------------------------------------------
+# 테이블 로더
+# ------------------------------------------------
+def _fetch_all_pages(make_query):
+    """make_query() 가 만드는 (정렬된) 쿼리의 결과를 PAGE_SIZE 단위로 끝까지 받는다."""
+    all_data, start = [], 0
+    while True:
+        chunk = make_query().range(start, start + PAGE_SIZE - 1).execute().data or []
+        all_data.extend(chunk)
+        if len(chunk) < PAGE_SIZE:
+            return all_data
+        start += PAGE_SIZE
+
+
+@st.cache_data(ttl=CACHE_TTL)
+@schema.typed("total_return")
+def load_total_return(columns: str = TOTAL_RETURN_COLUMNS, limit: Optional[int] = None) -> pd.DataFrame:
+    """total_return (수익률 내림차순)"""
+    if RANKINGS_SOURCE == "local":
+        return _local_table("total_return", columns, limit)
+    return _load_total_return(columns, limit)
+
+
+@disk_cache.cached(ttl=CACHE_TTL, tables=("total_return",))
+def _load_total_return(columns, limit):
+    def make_query():
+        # 페이지 경계에서 행이 겹치거나 빠지지 않도록 종목코드로 순서를 고정한다
+        return get_client().table("total_return").select(columns).order("수익률", desc=True).order("종목코드")
+
+    if limit and limit <= PAGE_SIZE:
+        return pd.DataFrame(make_query().limit(limit).execute().data)
+    # 전체 테이블은 max-rows(1000) 를 넘으므로 페이지 단위로 모두 받는다
+    rows = _fetch_all_pages(make_query)
+    return pd.DataFrame(rows[:limit] if limit else rows)
+
+
+@st.cache_data(ttl=CACHE_TTL)
+@schema.typed("total_return")
+@disk_cache.cached(ttl=CACHE_TTL, tables=("total_return",))
+def load_stock_names() -> pd.DataFrame:
+    """종목 목록 (종목코드, 종목명) — RANKINGS_SOURCE 와 관계없이 항상 DB 의 total_return 에서"""
+    rows = _fetch_all_pages(lambda: get_client().table("total_return").select("종목코드, 종목명").order("종목코드"))
+    return pd.DataFrame(rows, columns=["종목코드", "종목명"])
+
+
+@st.cache_data(ttl=CACHE_TTL)
+@schema.typed("bt_points")
+@disk_cache.cached(ttl=CACHE_TTL, tables=("bt_points",))
+def load_bt_points(code: Optional[str] = None, columns: str = "종목코드, b가격") -> pd.DataFrame:
+    """bt_points (code 를 주면 해당 종목만, b가격 오름차순)"""
+    if code is not None:
+        rows = get_client().table("bt_points").select(columns).eq("종목코드", code).execute().data
+    else:
+        # 전체 테이블은 max-rows(1000) 를 넘으므로 페이지 단위로 모두 받는다
+        rows = _fetch_all_pages(
+            lambda: get_client().table("bt_points").select(columns).order("종목코드").order("b가격")
+        )
+    df = pd.DataFrame(rows)
+    if not df.empty and "b가격" in df.columns:
+        df["b가격"] = df["b가격"].astype(float)
+        if code is not None:
+            df = df.sort_values("b가격")
+    return df
+
+
+def _price_query(code):
+    return get_client().table("prices").select("날짜, 종가").eq("종목코드", code)
+
+
+def fetch_price_rows_offset(code, page_size=PAGE_SIZE):
+    """
+    OFFSET(.range) 방식 페이지 조회. 건너뛴 행을 매번 다시 스캔하므로 긴 이력에서는 O(n²).
+    (비교/벤치마크용으로 남겨둔다)
+    """
+    all_data, start = [], 0
+    while True:
+        chunk = (
+            _price_query(code)
+            .order("날짜", desc=False)
+            .range(start, start + page_size - 1)
+            .execute()
+        ).data or []
+        all_data.extend(chunk)
+        if len(chunk) < page_size:
+            return all_data
+        start += page_size
+
+
+def fetch_price_rows_keyset(code, after=None, until=None, page_size=PAGE_SIZE):
+    """
+    날짜 커서(keyset) 페이지 조회: 마지막으로 받은 날짜 다음부터(.gt) 이어서 받는다.
+    after < 날짜 <= until 구간만 조회 (None 이면 제한 없음).
+    종목 안에서 날짜가 유일하다는 전제 (prices 는 종목코드+날짜 당 한 행).
+    """
+    all_data = []
+    while True:
+        query = _price_query(code)
+        if after is not None:
+            query = query.gt("날짜", after)
+        if until is not None:
+            query = query.lte("날짜", until)
+        chunk = query.order("날짜", desc=False).limit(page_size).execute().data or []
+        all_data.extend(chunk)
+        if len(chunk) < page_size:
+            return all_data
+        after = chunk[-1]["날짜"]
+
+
+def _price_bounds(code):
+    """(행 수, 첫 날짜, 마지막 날짜) — 두 개의 작은 요청을 동시에 보낸다."""
+    def first_row():
+        return (
+            get_client().table("prices")
+            .select("날짜", count="exact")
+            .eq("종목코드", code)
+            .order("날짜", desc=False)
+            .limit(1)
+            .execute()
+        )
+
+    def last_row():
+        return (
+            get_client().table("prices")
+            .select("날짜")
+            .eq("종목코드", code)
+            .order("날짜", desc=True)
+            .limit(1)
+            .execute()
+        )
+
+    first_future = _executor.submit(first_row)
+    last_future = _executor.submit(last_row)
+    first, last = first_future.result(), last_future.result()
+    if not first.data or not last.data:
+        return 0, None, None
+    return first.count, first.data[0]["날짜"], last.data[0]["날짜"]
+
+
+def _split_dates(first, last, parts):
+    """[first, last] 기간을 parts 개 구간으로 나누는 경계 날짜들 (ISO 문자열)"""
+    d0 = date.fromisoformat(str(first)[:10])
+    d1 = date.fromisoformat(str(last)[:10])
+    span = (d1 - d0).days
+    cuts = {(d0 + timedelta(days=span * i // parts)).isoformat() for i in range(1, parts)}
+    return sorted(c for c in cuts if c < d1.isoformat())
+
+
+def fetch_price_rows(code, page_size=PAGE_SIZE):
+    """
+    종목의 prices 행 전체를 날짜 오름차순으로 가져온다.
+
+    행 수와 첫/마지막 날짜를 먼저 구한 뒤, 기간을 (행 수 / page_size) 개의 날짜 구간으로 나눠
+    구간마다 keyset 페이지 조회를 동시에 실행하고 구간 순서대로 이어 붙인다.
+    OFFSET 스캔이 없고, 지연시간은 구간 합계가 아니라 가장 느린 구간에 좌우된다.
+    """
+    total, first, last = _price_bounds(code)
+    if not total:
+        return []
+
+    cuts = _split_dates(first, last, math.ceil(total / page_size))
+    if not cuts:
+        return fetch_price_rows_keyset(code, page_size=page_size)
+
+    # (None, c1], (c1, c2], ..., (cN, None) — 마지막 구간은 위가 열려 있어 새로 추가된 행도 받는다
+    windows = list(zip([None] + cuts, cuts + [None]))
+    chunks = _executor.map(
+        lambda w: fetch_price_rows_keyset(code, after=w[0], until=w[1], page_size=page_size),
+        windows,
+    )
+    return [row for chunk in chunks for row in chunk]
+
+
+# ------------------------------------------------
+# 여러 종목 한꺼번에 (가격 행렬용)
+# ------------------------------------------------
+# 한 요청에 묶을 종목 수 (묶음 하나가 한 스레드에서 차례로 페이지를 받는다)
+BULK_BATCH_SIZE = int(os.environ.get("DB_BULK_BATCH_SIZE", "100"))
+
+
+def fetch_price_rows_batch(codes, after=None, page_size=PAGE_SIZE):
+    """
+    여러 종목의 prices 행 (종목코드, 날짜, 종가) 을 (종목코드, 날짜) 순서로 받는다.
+    (종목코드, 날짜) 인덱스 순서 그대로 읽는 keyset:
+    페이지가 한 종목 중간에서 끊기면 그 종목만 .eq + .gt(날짜) 로 마저 받고, 나머지 종목은 다시 .in_() 으로.
+    after 를 주면 그 날짜 이후 행만.
+    """
+    codes = sorted({str(c) for c in codes})
+    all_data, cursor = [], None
+    while codes:
+        query = get_client().table("prices").select("종목코드, 날짜, 종가")
+        if cursor is not None:
+            query = query.eq("종목코드", cursor[0]).gt("날짜", cursor[1])
+        else:
+            query = query.in_("종목코드", codes)
+            if after is not None:
+                query = query.gt("날짜", after)
+        chunk = query.order("종목코드").order("날짜").limit(page_size).execute().data or []
+        all_data.extend(chunk)
+        if len(chunk) < page_size:
+            if cursor is None:
+                return all_data
+            # 끊겼던 종목을 다 받았으니 나머지 종목으로
+            codes = [c for c in codes if c > cursor[0]]
+            cursor = None
+            continue
+        cursor = (str(chunk[-1]["종목코드"]), chunk[-1]["날짜"])
+        codes = [c for c in codes if c >= cursor[0]]
+    return all_data
+
+
+def fetch_price_rows_bulk(codes, after=None, batch_size=None, page_size=PAGE_SIZE):
+    """codes 를 batch_size 개씩 묶어 .in_() 요청으로 동시에 받는다 (순서는 보장하지 않음)"""
+    batch_size = batch_size or BULK_BATCH_SIZE
+    codes = list(codes)
+    batches = [codes[i:i + batch_size] for i in range(0, len(codes), batch_size)]
+    chunks = _executor.map(lambda b: fetch_price_rows_batch(b, after=after, page_size=page_size), batches)
+    return [row for chunk in chunks for row in chunk]
+
+
+@st.cache_data(ttl=CACHE_TTL)
+@schema.typed("prices")
+@disk_cache.cached(ttl=CACHE_TTL, tables=("prices",))
+def load_prices(code: str, resolution: str = "D") -> pd.DataFrame:
+    """
+    prices 종가 이력 (날짜 오름차순, 로컬 저장소가 있으면 새로 추가된 행만 받아온다)
+    resolution: "D" 일봉, "W" 주봉, "M" 월봉 (주/월은 시가·고가·저가·종가 OHLC)
+    """
+    from core import price_store
+    from core.chart_data import resample_ohlc
+
+    if resolution != "D":
+        from core import snapshots
+
+        # 상세 페이지가 보는 일봉 공유 스냅샷((code, "D") 키)을 그대로 쓴다 → 일봉을 다시 받거나 한 벌 더 두지 않는다
+        daily = snapshots.get(load_prices, code, "D")
+        if price_store.enabled() and not daily.empty:
+            return price_store.aggregate(code, resolution, daily)
+        return resample_ohlc(daily, resolution)
+
+    if price_store.enabled():
+        return price_store.sync(code)
+
+    df = pd.DataFrame(fetch_price_rows(code))
+    if not df.empty:
+        df["날짜"] = pd.to_datetime(df["날짜"])
+        df = df.sort_values("날짜")
+    return df
+
+
+def _local_table(table, columns, limit):
+    """core.rank_engine 이 prices + bt_points 로 계산한 같은 모양의 테이블"""
+    from core import rank_engine
+
+    df = rank_engine.load_local_tables()[table]
+    df = df[[c.strip() for c in columns.split(",")]]
+    return df.head(limit) if limit else df
+
+
+@disk_cache.cached(ttl=CACHE_TTL, tables=("b_return", "b_return_shoot"))
+def _load_ranked(table, limit):
+    res = (
+        get_client().table(table)
+        .select(B_RETURN_COLUMNS)
+        .order("수익률", desc=True)
+        .limit(limit)
+        .execute()
+    )
+    return pd.DataFrame(res.data)
+
+
+@st.cache_data(ttl=CACHE_TTL)
+@schema.typed("b_return")
+def load_b_return(limit: int = 1000) -> pd.DataFrame:
+    """b_return (눌림, 수익률 내림차순)"""
+    if RANKINGS_SOURCE == "local":
+        return _local_table("b_return", B_RETURN_COLUMNS, limit)
+    return _load_ranked("b_return", limit)
+
+
+@st.cache_data(ttl=CACHE_TTL)
+@schema.typed("b_return_shoot")
+def load_b_return_shoot(limit: int = 1000) -> pd.DataFrame:
+    """b_return_shoot (돌파, 수익률 내림차순)"""
+    if RANKINGS_SOURCE == "local":
+        return _local_table("b_return_shoot", B_RETURN_COLUMNS, limit)
+    return _load_ranked("b_return_shoot", limit)
+
+
+@st.cache_data(ttl=CACHE_TTL)
+@schema.typed("b_zone_monthly_tracking")
+@disk_cache.cached(ttl=CACHE_TTL, tables=("b_zone_monthly_tracking",))
+def load_monthly_tracking() -> pd.DataFrame:
+    """b_zone_monthly_tracking (+ 탭 표시용 '월포맷' 컬럼, 예: 24.05)"""
+    # 전체 테이블은 max-rows(1000) 를 넘으므로 페이지 단위로 모두 받는다
+    rows = _fetch_all_pages(
+        lambda: get_client().table("b_zone_monthly_tracking")
+        .select(MONTHLY_TRACKING_COLUMNS)
+        .order("월구분", desc=True)
+        .order("종목코드")
+        .order("b가격")
+    )
+    df = pd.DataFrame(rows)
+    if df.empty:
+        return df
+
+    df["월포맷"] = pd.to_datetime(df["월구분"], errors="coerce").dt.strftime("%y.%m")
+    df = df[df["월포맷"].notna()]
+    df = df.fillna(0)
+    return df
+
+
+# ------------------------------------------------
+# 투자 적정 구간 (현재가격이 b가격 ±band_pct% 이내)
+# ------------------------------------------------
+B_ZONE_COLUMNS = ["종목명", "종목코드", "b가격", "현재가격", "변동률"]
+
+
+def _b_zone_from_rpc(band_pct):
+    """DB 함수 b_zone_candidates (sql/b_zone_candidates.sql) 로 일치하는 행만 받아온다."""
+    return _fetch_all_pages(lambda: get_client().rpc("b_zone_candidates", {"band_pct": band_pct}))
+
+
+def _b_zone_from_frames(band_pct):
+    """RPC 를 쓸 수 없는 백엔드(로컬 대체본 등)용: 두 테이블을 받아 pandas 로 병합"""
+    from core import page_data
+
+    data, errors = page_data.fetch({
+        "bt_points": (partial(load_bt_points, columns="종목코드, b가격"),),
+        "total_return": (partial(load_total_return, columns="종목명, 종목코드, 현재가격"),),
+    })
+    if errors:
+        raise next(iter(errors.values()))
+    df_b, df_t = data["bt_points"], data["total_return"]
+    if df_b.empty or df_t.empty:
+        return pd.DataFrame(columns=B_ZONE_COLUMNS)
+
+    df = pd.merge(df_b, df_t, on="종목코드", how="inner")
+    # 가격은 float32 로 캐시되므로 비율 계산은 float64 로 (BPriceIndex 와 같은 값, 그리드에 -4.909999… 로 보이지 않게)
+    df = df.astype({"현재가격": float, "b가격": float})
+    ratio = band_pct / 100
+    df = df[(df["현재가격"] >= df["b가격"] * (1 - ratio)) & (df["현재가격"] <= df["b가격"] * (1 + ratio))]
+    df = df.assign(변동률=((df["현재가격"] - df["b가격"]) / df["b가격"] * 100).round(2))
+    return df.sort_values(["변동률", "종목코드", "b가격"], ascending=True)[B_ZONE_COLUMNS]
+
+
+@st.cache_data(ttl=CACHE_TTL)
+@schema.typed("b_zone_candidates")
+@disk_cache.cached(ttl=CACHE_TTL, tables=("bt_points", "total_return"))
+def load_b_zone_candidates(band_pct: float = 5.0) -> pd.DataFrame:
+    """
+    현재가격이 b가격 ±band_pct% 이내인 (종목, b가격) 행, 변동률 오름차순.
+    DB 에서 필터링하므로 응답 크기는 전체 종목 수가 아니라 일치하는 행 수에 비례한다.
+    """
+    if not hasattr(get_client(), "rpc"):
+        return _b_zone_from_frames(band_pct)
+    try:
+        rows = _b_zone_from_rpc(float(band_pct))
+    except Exception as e:
+        # 함수가 아직 배포되지 않은 경우 등 → 기존 방식으로 대체
+        logger.warning("b_zone_candidates RPC 실패, pandas 병합으로 대체: %s", e)
+        return _b_zone_from_frames(band_pct)
+    return pd.DataFrame(rows, columns=B_ZONE_COLUMNS)
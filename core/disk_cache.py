@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+프로세스 간 공유되는 디스크 캐시 (SQLite 파일 하나).
+
+st.cache_data 는 프로세스 메모리에만 있어서 재시작/배포/레플리카마다 처음부터 다시 받는다.
+이 캐시는 로더 아래에 한 단계 더 깔려서, 같은 호스트의 모든 Streamlit 프로세스가 결과를 공유한다.
+
+  st.cache_data (프로세스 메모리) → disk_cache (호스트 공유) → Supabase
+
+키: 백엔드 + 로더 이름 + 인자 + 데이터 버전(core.versions), 전체 크기가 DISK_CACHE_MAX_MB 를 넘으면
+가장 오래 안 쓰인 항목부터 지운다.
+TTL 이 지난 항목은 바로 지우지 않고 이전 값을 돌려주면서 core.refresher 가 뒤에서 갱신한다.
+"""
+import functools
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from core import singleflight
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = os.environ.get(
+    "DISK_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "query_cache.sqlite"),
+)
+MAX_BYTES = int(float(os.environ.get("DISK_CACHE_MAX_MB", "512")) * 1024 * 1024)
+# TTL 이 지난 뒤에도 이 시간 동안은 이전 값을 돌려주고 뒤에서 갱신한다 (stale-while-revalidate)
+STALE_SECONDS = float(os.environ.get("DISK_CACHE_STALE_SECONDS", "86400"))
+
+_local = threading.local()
+
+
+def _backend_key():
+    # core.db 가 이 모듈의 데코레이터를 쓰므로 import 는 호출 시점에
+    from core import db
+    return db.backend_key()
+
+
+def enabled():
+    """DISK_CACHE_PATH 가 비어 있거나 영속 저장할 수 없는 백엔드(메모리 SQLite)면 끈다."""
+    return bool(CACHE_PATH) and _backend_key() is not None
+
+
+def _conn():
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+        conn = sqlite3.connect(CACHE_PATH, timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, value BLOB, size INTEGER,"
+            " created REAL, accessed REAL, expires REAL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed)")
+        _local.conn = conn
+    return conn
+
+
+def get(key):
+    """(값, 저장 시각) — 없거나 만료되었으면 None"""
+    now = time.time()
+    row = _conn().execute(
+        "SELECT value, created FROM entries WHERE key = ? AND expires > ?", (key, now)
+    ).fetchone()
+    if row is None:
+        return None
+    _conn().execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+    return pickle.loads(row[0]), row[1]
+
+
+def created_at(key):
+    """저장 시각 (없으면 None) — 값은 읽지 않는다"""
+    row = _conn().execute(
+        "SELECT created FROM entries WHERE key = ? AND expires > ?", (key, time.time())
+    ).fetchone()
+    return None if row is None else row[0]
+
+
+def latest(base):
+    """같은 로더+인자의 (버전이 다른) 저장본 중 가장 최근 것 (값, 저장 시각) — 없으면 None"""
+    prefix = base + "|"
+    row = _conn().execute(
+        "SELECT value, created FROM entries WHERE substr(key, 1, ?) = ? AND expires > ?"
+        " ORDER BY created DESC LIMIT 1",
+        (len(prefix), prefix, time.time()),
+    ).fetchone()
+    return None if row is None else (pickle.loads(row[0]), row[1])
+
+
+def put(key, value, ttl, base=None):
+    """base 를 주면 같은 로더+인자의 다른 버전 저장본은 지운다."""
+    blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    now = time.time()
+    conn = _conn()
+    conn.execute(
+        "INSERT OR REPLACE INTO entries (key, value, size, created, accessed, expires)"
+        " VALUES (?, ?, ?, ?, ?, ?)",
+        (key, blob, len(blob), now, now, now + ttl),
+    )
+    if base is not None:
+        prefix = base + "|"
+        conn.execute(
+            "DELETE FROM entries WHERE substr(key, 1, ?) = ? AND key != ?", (len(prefix), prefix, key)
+        )
+    _evict(conn)
+
+
+def _evict(conn):
+    """만료된 항목을 지우고, 총 크기가 MAX_BYTES 를 넘으면 LRU 순으로 90% 까지 줄인다."""
+    conn.execute("DELETE FROM entries WHERE expires <= ?", (time.time(),))
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+    if total <= MAX_BYTES:
+        return
+    target = total - int(MAX_BYTES * 0.9)
+    freed = 0
+    victims = []
+    for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed ASC"):
+        victims.append((key,))
+        freed += size
+        if freed >= target:
+            break
+    conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+
+
+def clear():
+    if os.path.exists(CACHE_PATH):
+        _conn().execute("DELETE FROM entries")
+
+
+@contextmanager
+def current_only():
+    """with 블록 동안 (현재 스레드에서) TTL 이 지난 값 / 이전 버전을 미스로 보고 새로 받는다"""
+    prev = getattr(_local, "current_only", False)
+    _local.current_only = True
+    try:
+        yield
+    finally:
+        _local.current_only = prev
+
+
+def make_key(name, args, kwargs):
+    """버전을 뺀 기본 키 (백엔드 + 로더 + 인자)"""
+    return f"{_backend_key()}|{name}|{args!r}|{sorted(kwargs.items())!r}"
+
+
+def resolve(base, tables, ttl):
+    """
+    (실제 키, TTL). 키 끝에 tables 의 데이터 버전이 붙는다.
+    버전을 알 수 있으면 버전이 바뀔 때 새 키가 되므로 TTL 은 길게(VERSIONED_TTL) 잡는다.
+    """
+    from core import versions
+
+    version = versions.token(tables)
+    return f"{base}|{version}", (versions.VERSIONED_TTL if version else ttl)
+
+
+def cached(ttl, tables=()):
+    """
+    로더용 데코레이터 (@st.cache_data 바로 아래에 붙인다).
+    tables: 로더가 읽는 테이블 — 그 테이블의 데이터 버전이 바뀌면 새로 받는다.
+    TTL 이 지났거나 버전이 바뀐 경우에도 이전 값을 바로 돌려주고 갱신은 백그라운드에 맡긴다.
+    (CACHE_REFRESH=0 이면 그 자리에서 다시 받는다)
+    실제 조회는 singleflight 로 합쳐진다 (디스크 캐시를 쓰지 않는 백엔드에서도).
+    캐시 오류는 로더를 막지 않고 그냥 원본 조회로 넘어간다.
+    """
+    def decorator(fn):
+        name = f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            base = make_key(name, args, kwargs)
+            from core import metrics, refresher
+
+            if not enabled():
+                metrics.record_cache(name, "miss")
+                return singleflight.do(name, base, fn, *args, **kwargs)
+
+            try:
+                key, key_ttl = resolve(base, tables, ttl)
+                hit = get(key)
+                stale = hit is None and latest(base)
+            except Exception as e:
+                logger.warning("disk cache 읽기 실패 (%s): %s", name, e)
+                key, key_ttl, hit, stale = None, ttl, None, None
+            # 갱신기가 꺼져 있으면 아무도 새로 받아 주지 않으므로 TTL 이 지난 값 / 이전 버전은 미스로 본다
+            # (current_only() 안에서도 마찬가지)
+            fresh_only = not refresher.ENABLED or getattr(_local, "current_only", False)
+            if hit is not None and fresh_only and time.time() - hit[1] >= key_ttl:
+                hit = None
+            if fresh_only:
+                stale = None
+            if hit is not None:
+                value, created = hit
+                metrics.record_cache(name, "hit")
+                refresher.touch(base, fn, args, kwargs, tables, ttl)
+                if time.time() - created >= key_ttl:
+                    refresher.schedule(base)
+                return value
+            if stale:
+                # 버전이 바뀜 → 이전 버전을 돌려주고 새 버전은 뒤에서 받는다
+                metrics.record_cache(name, "stale")
+                refresher.touch(base, fn, args, kwargs, tables, ttl)
+                refresher.schedule(base)
+                return stale[0]
+
+            # 같은 키를 동시에 받는 다른 세션/갱신 스레드가 있으면 그 결과를 같이 쓴다
+            metrics.record_cache(name, "miss")
+            value = singleflight.do(name, base, fn, *args, **kwargs)
+            if key is not None:
+                try:
+                    put(key, value, key_ttl + STALE_SECONDS, base=base)
+                except Exception as e:
+                    logger.warning("disk cache 쓰기 실패 (%s): %s", name, e)
+                refresher.touch(base, fn, args, kwargs, tables, ttl)
+            return value
+
+        return wrapper
+
+    return decorator
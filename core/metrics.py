@@ -0,0 +1,350 @@
+# -*- coding: utf-8 -*-
+"""
+조회 / 캐시 / 페이지 실행 시간 계측.
+
+- 쿼리: db.get_client() 가 돌려주는 클라이언트를 감싸서 모든 execute() 의
+  테이블, 조건(메서드 + 컬럼), 행 수, 응답 크기(추정), 지연 시간, 오류를 기록한다.
+- 캐시: 디스크 캐시 hit / stale / miss, st.cache_data 미스(= 로더 본문 실행) 횟수.
+- 페이지: page_start() ~ page_end() 사이 스크립트 실행 시간과 그 사이의 쿼리 수 / 쿼리 시간.
+지연 시간은 계열별 고정 크기 링 버퍼에 두고 p50 / p95 를 계산한다.
+
+보는 곳
+  - 페이지 URL 에 ?perf=1 → 페이지 아래 숨은 성능 패널 (page_end 가 그린다)
+  - METRICS_FILE 을 지정하면 Prometheus 텍스트 형식으로 주기적으로 파일에 쓴다 (node_exporter textfile 등)
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+
+import streamlit as st
+
+from core import script_ctx
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.environ.get("QUERY_METRICS", "1") != "0"
+RING_SIZE = int(os.environ.get("METRICS_RING_SIZE", "256"))
+RECENT_QUERIES = int(os.environ.get("METRICS_RECENT_QUERIES", "100"))
+METRICS_FILE = os.environ.get("METRICS_FILE", "")
+WRITE_SECONDS = float(os.environ.get("METRICS_WRITE_SECONDS", "15"))
+# 이보다 느린 쿼리는 로그에도 남긴다
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "1000"))
+PANEL_PARAM = "perf"
+
+_lock = threading.Lock()
+_queries = defaultdict(lambda: {"count": 0, "errors": 0, "rows": 0, "bytes": 0, "seconds": 0.0, "ring": deque(maxlen=RING_SIZE)})
+_pages = defaultdict(lambda: {"count": 0, "seconds": 0.0, "ring": deque(maxlen=RING_SIZE)})
+_cache = defaultdict(lambda: defaultdict(int))  # 로더 → {"hit", "stale", "miss", "load"}
+_recent = deque(maxlen=RECENT_QUERIES)
+_runs = {}  # 세션 id → 현재 페이지 실행 {"page", "start", "queries", "query_seconds"}
+_last_write = 0.0
+
+# execute() 전까지 기록할 빌더 메서드 (나머지는 조건 모양에 넣지 않는다)
+_SHAPE_METHODS = {"select", "eq", "neq", "gt", "gte", "lt", "lte", "in_", "ilike", "like", "is_", "order", "limit", "range"}
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+def _estimate_bytes(data):
+    """응답 JSON 크기 추정 (앞쪽 20 행 크기 × 행 수 — 큰 응답 전체를 다시 직렬화하지 않는다)"""
+    if not isinstance(data, list) or not data:
+        return 0
+    sample = data[:20]
+    return int(len(json.dumps(sample, default=str, ensure_ascii=False).encode()) / len(sample) * len(data))
+
+
+# ------------------------------------------------
+# 쿼리 계측 (클라이언트 / 쿼리 빌더 감싸기)
+# ------------------------------------------------
+class _Query:
+    def __init__(self, inner, table, ops):
+        self._inner = inner
+        self._table = table
+        self._ops = ops
+
+    def __getattr__(self, name):
+        attr = getattr(self._inner, name)
+        if not callable(attr):
+            return attr
+        if name == "execute":
+            return self._execute
+
+        def method(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if hasattr(result, "execute"):
+                # (메서드, 컬럼, 나머지 인자, 키워드) — range / limit 처럼 컬럼이 없으면 인자 전체
+                column = args[0] if args and isinstance(args[0], str) else ""
+                op = (name, column, args[1:] if column else args, kwargs)
+                return _Query(result, self._table, self._ops + (op,) if name in _SHAPE_METHODS else self._ops)
+            return result
+
+        return method
+
+    def _execute(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            res = self._inner.execute(*args, **kwargs)
+        except Exception as e:
+            record_query(self._table, self._ops, 0, 0, time.perf_counter() - start, error=e)
+            raise
+        data = getattr(res, "data", None)
+        rows = len(data) if isinstance(data, list) else 0
+        record_query(self._table, self._ops, rows, _estimate_bytes(data), time.perf_counter() - start)
+        return res
+
+
+class _Client:
+    """table() / rpc() 가 계측되는 클라이언트. 나머지 속성(path, supabase_url, query 등)은 그대로 넘긴다."""
+
+    def __init__(self, inner):
+        self._inner = inner
+
+    def table(self, name):
+        return _Query(self._inner.table(name), name, ())
+
+    def __getattr__(self, name):
+        attr = getattr(self._inner, name)
+        if name == "rpc":
+            # rpc 가 없는 백엔드(로컬 대체본)에서는 hasattr(client, "rpc") 가 그대로 False
+            return lambda fn, *args, **kwargs: _Query(attr(fn, *args, **kwargs), f"rpc:{fn}", ())
+        return attr
+
+
+def instrument(client):
+    if not ENABLED or isinstance(client, _Client):
+        return client
+    return _Client(client)
+
+
+def _shape(ops):
+    """조건 모양 (값 없이 메서드 + 컬럼) — 계열 이름으로 쓴다"""
+    return ",".join(f"{name}({column})" if column else name for name, column, _, _ in ops if name != "select")
+
+
+def _describe(ops):
+    """최근 쿼리 목록용 (값 포함, 길면 자름)"""
+    parts = []
+    for name, column, args, kwargs in ops:
+        values = [repr(a)[:40] for a in args] + [f"{k}={v!r}" for k, v in kwargs.items()]
+        parts.append(f"{name}({', '.join(([column] if column else []) + values)})")
+    return ".".join(parts)
+
+
+def record_query(table, ops, rows, nbytes, seconds, error=None):
+    series = (table, _shape(ops))
+    sid = script_ctx.session_id()
+    with _lock:
+        q = _queries[series]
+        q["count"] += 1
+        q["errors"] += error is not None
+        q["rows"] += rows
+        q["bytes"] += nbytes
+        q["seconds"] += seconds
+        q["ring"].append(seconds)
+        run = _runs.get(sid)
+        if run is not None:
+            run["queries"] += 1
+            run["query_seconds"] += seconds
+        _recent.append({
+            "시각": time.strftime("%H:%M:%S"),
+            "페이지": run["page"] if run is not None else "(백그라운드)",
+            "테이블": table,
+            "조건": _describe(ops),
+            "행 수": rows,
+            "KB": nbytes / 1024,
+            "ms": seconds * 1000,
+            "오류": "" if error is None else str(error)[:200],
+        })
+    if error is not None:
+        logger.warning("쿼리 실패 %s %s (%.0fms): %s", table, _describe(ops), seconds * 1000, error)
+    elif seconds * 1000 >= SLOW_QUERY_MS:
+        logger.info("느린 쿼리 %s %s: %d행 %.0fms", table, _describe(ops), rows, seconds * 1000)
+
+
+# ------------------------------------------------
+# 캐시 / 페이지
+# ------------------------------------------------
+def record_cache(name, outcome):
+    """outcome: "hit" | "stale" | "miss" (디스크 캐시), "load" (st.cache_data 미스)"""
+    with _lock:
+        _cache[name.rsplit(".", 1)[-1]][outcome] += 1
+
+
+def page_start(page):
+    """페이지 스크립트 맨 위에서 호출 (이번 실행의 시작 시각 / 쿼리 수를 세기 시작)"""
+    sid = script_ctx.session_id()
+    now = time.perf_counter()
+    with _lock:
+        # st.stop 등으로 page_end 까지 오지 못한 오래된 실행은 버린다
+        for old in [k for k, run in _runs.items() if now - run["start"] > 3600]:
+            del _runs[old]
+        _runs[sid] = {"page": page, "start": now, "queries": 0, "query_seconds": 0.0}
+
+
+def page_end():
+    """
+    페이지 스크립트 맨 아래에서 호출: 실행 시간을 기록하고 ?perf=1 이면 성능 패널을 그린다.
+    (중간에 st.stop / switch_page 로 끝난 실행은 기록되지 않는다)
+    """
+    sid = script_ctx.session_id()
+    with _lock:
+        run = _runs.pop(sid, None)
+        if run is not None:
+            seconds = time.perf_counter() - run["start"]
+            p = _pages[run["page"]]
+            p["count"] += 1
+            p["seconds"] += seconds
+            p["ring"].append(seconds)
+    if run is not None:
+        run["seconds"] = seconds
+    _maybe_write()
+    if st.query_params.get(PANEL_PARAM) == "1":
+        show_panel(run)
+
+
+# ------------------------------------------------
+# 요약 / 내보내기
+# ------------------------------------------------
+def query_summary():
+    """[(테이블, 조건, 횟수, 오류, 평균 행 수, 평균 KB, p50 ms, p95 ms, 합계 s)] 합계 시간 큰 순"""
+    with _lock:
+        items = [(k, dict(v, ring=list(v["ring"]))) for k, v in _queries.items()]
+    rows = []
+    for (table, shape), q in items:
+        n = q["count"]
+        rows.append({
+            "테이블": table, "조건": shape, "횟수": n, "오류": q["errors"],
+            "평균 행 수": q["rows"] / n, "평균 KB": q["bytes"] / n / 1024,
+            "p50 ms": _percentile(q["ring"], 50) * 1000, "p95 ms": _percentile(q["ring"], 95) * 1000,
+            "합계 s": q["seconds"],
+        })
+    return sorted(rows, key=lambda r: -r["합계 s"])
+
+
+def page_summary():
+    with _lock:
+        items = [(k, dict(v, ring=list(v["ring"]))) for k, v in _pages.items()]
+    return [
+        {"페이지": page, "실행 수": p["count"], "p50 ms": _percentile(p["ring"], 50) * 1000,
+         "p95 ms": _percentile(p["ring"], 95) * 1000}
+        for page, p in sorted(items)
+    ]
+
+
+def cache_summary():
+    with _lock:
+        items = {name: dict(c) for name, c in _cache.items()}
+    return [
+        {"로더": name, "cache_data 미스": c.get("load", 0), "디스크 hit": c.get("hit", 0),
+         "디스크 stale": c.get("stale", 0), "디스크 miss": c.get("miss", 0)}
+        for name, c in sorted(items.items())
+    ]
+
+
+def recent_queries():
+    with _lock:
+        return list(_recent)[::-1]
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def prometheus_text():
+    """Prometheus 텍스트 형식 (쿼리 / 페이지 / 캐시 / single-flight / 선조회)"""
+    from core import prefetch, singleflight
+
+    lines = [
+        "# TYPE app_query_total counter", "# TYPE app_query_errors_total counter",
+        "# TYPE app_query_rows_total counter", "# TYPE app_query_bytes_total counter",
+        "# TYPE app_query_seconds summary",
+    ]
+    for q in query_summary():
+        labels = f'table="{_label(q["테이블"])}",shape="{_label(q["조건"])}"'
+        n = q["횟수"]
+        lines += [
+            f"app_query_total{{{labels}}} {n}",
+            f"app_query_errors_total{{{labels}}} {q['오류']}",
+            f"app_query_rows_total{{{labels}}} {q['평균 행 수'] * n:.0f}",
+            f"app_query_bytes_total{{{labels}}} {q['평균 KB'] * n * 1024:.0f}",
+            f'app_query_seconds{{{labels},quantile="0.5"}} {q["p50 ms"] / 1000:.6f}',
+            f'app_query_seconds{{{labels},quantile="0.95"}} {q["p95 ms"] / 1000:.6f}',
+            f"app_query_seconds_sum{{{labels}}} {q['합계 s']:.6f}",
+            f"app_query_seconds_count{{{labels}}} {n}",
+        ]
+    lines.append("# TYPE app_page_seconds summary")
+    for p in page_summary():
+        labels = f'page="{_label(p["페이지"])}"'
+        lines += [
+            f'app_page_seconds{{{labels},quantile="0.5"}} {p["p50 ms"] / 1000:.6f}',
+            f'app_page_seconds{{{labels},quantile="0.95"}} {p["p95 ms"] / 1000:.6f}',
+            f"app_page_seconds_count{{{labels}}} {p['실행 수']}",
+        ]
+    lines.append("# TYPE app_cache_total counter")
+    for c in cache_summary():
+        for outcome, key in (("load", "cache_data 미스"), ("hit", "디스크 hit"), ("stale", "디스크 stale"), ("miss", "디스크 miss")):
+            lines.append(f'app_cache_total{{loader="{_label(c["로더"])}",outcome="{outcome}"}} {c[key]}')
+    lines.append("# TYPE app_singleflight_total counter")
+    for name, counter in singleflight.stats().items():
+        for kind, value in counter.items():
+            lines.append(f'app_singleflight_total{{loader="{_label(name.rsplit(".", 1)[-1])}",kind="{kind}"}} {value}')
+    lines.append("# TYPE app_prefetch_total counter")
+    for kind, value in prefetch.stats().items():
+        if isinstance(value, (int, float)):
+            lines.append(f'app_prefetch_total{{kind="{_label(kind)}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+def _maybe_write():
+    """METRICS_FILE 이 있으면 WRITE_SECONDS 마다 한 번 (임시 파일에 쓰고 바꿔치기)"""
+    global _last_write
+    if not METRICS_FILE or time.monotonic() - _last_write < WRITE_SECONDS:
+        return
+    _last_write = time.monotonic()
+    try:
+        tmp = f"{METRICS_FILE}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(prometheus_text())
+        os.replace(tmp, METRICS_FILE)
+    except Exception as e:
+        logger.warning("metrics 파일 쓰기 실패 (%s): %s", METRICS_FILE, e)
+
+
+# ------------------------------------------------
+# 성능 패널 (?perf=1)
+# ------------------------------------------------
+def show_panel(run=None):
+    import pandas as pd
+
+    from core import prefetch, schema, singleflight
+
+    st.markdown("---")
+    with st.expander("🛠 성능 패널", expanded=True):
+        if run is not None:
+            st.caption(
+                f"이번 실행: {run['seconds'] * 1000:.0f}ms · 쿼리 {run['queries']}건 "
+                f"({run['query_seconds'] * 1000:.0f}ms)"
+            )
+        st.markdown("**쿼리 (계열별, 합계 시간 순)**")
+        st.dataframe(pd.DataFrame(query_summary()), use_container_width=True, hide_index=True)
+        st.markdown("**최근 쿼리**")
+        st.dataframe(pd.DataFrame(recent_queries()), use_container_width=True, hide_index=True)
+        st.markdown("**페이지 실행 시간**")
+        st.dataframe(pd.DataFrame(page_summary()), use_container_width=True, hide_index=True)
+        st.markdown("**캐시**")
+        st.dataframe(pd.DataFrame(cache_summary()), use_container_width=True, hide_index=True)
+        flights = [{"로더": name.rsplit(".", 1)[-1], **c} for name, c in sorted(singleflight.stats().items())]
+        st.dataframe(pd.DataFrame(flights), use_container_width=True, hide_index=True)
+        st.markdown("**선조회**")
+        st.json(prefetch.stats())
+        st.markdown("**캐시 메모리 (타입 변환 전/후)**")
+        st.dataframe(schema.memory_report(), use_container_width=True, hide_index=True)
+        st.download_button("Prometheus 텍스트 받기", prometheus_text(), file_name="metrics.prom")
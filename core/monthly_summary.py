@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+b_zone_monthly_tracking 월별 / 전체 성과 요약.
+
+- 월별: 종목 수, 적중률(측정일대비수익률 > 0), 평균·중앙 수익률, 최고/최저수익률 분포, 누적 수익 곡선
+- 월별 결과는 엔진 안에 보관하고, 다음 호출 때는 내용이 바뀐 달(새 월구분, 갱신 중인 이번 달)만 다시 계산한다.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+RETURN_COLUMNS = ["측정일대비수익률", "최고수익률", "최저수익률"]
+QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+
+def _fingerprints(df):
+    """월구분별 (행 수, 수익률 합계들) — 달의 내용이 바뀌었는지 빠르게 확인하는 용도"""
+    return df.groupby("월구분", sort=False, observed=True)[RETURN_COLUMNS].agg(["count", "sum"])
+
+
+def summarize(df):
+    """월구분별 요약 (벡터 연산, 월구분 오름차순)"""
+    # 월구분이 범주형이어도 데이터가 없는 달은 만들지 않는다 (observed=True)
+    g = df.groupby("월구분", sort=True, observed=True)
+    r = g["측정일대비수익률"]
+    out = pd.DataFrame({
+        "종목수": g.size(),
+        "적중수": (df["측정일대비수익률"] > 0).groupby(df["월구분"], observed=True).sum(),
+        "수익률합계": r.sum(),
+        "평균수익률": r.mean(),
+        "중앙수익률": r.median(),
+        "최고수익률_평균": g["최고수익률"].mean(),
+        "최저수익률_평균": g["최저수익률"].mean(),
+    })
+    for q in QUANTILES:
+        out[f"최고수익률_p{int(q * 100)}"] = g["최고수익률"].quantile(q)
+        out[f"최저수익률_p{int(q * 100)}"] = g["최저수익률"].quantile(q)
+    out["적중률"] = out["적중수"] / out["종목수"] * 100
+    return out
+
+
+class MonthlySummaryEngine:
+    """월별 요약을 보관하고 바뀐 달만 다시 계산하는 엔진 (프로세스 전체에서 하나)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._months = pd.DataFrame()
+        self._prints = None
+        self._overall = {}
+
+    def update(self, df):
+        """
+        df: b_zone_monthly_tracking 전체 (월구분 + 수익률 컬럼).
+        반환: (월별 요약 DataFrame, 전체 요약 dict)
+        """
+        if df.empty:
+            return pd.DataFrame(), {}
+        df = df.astype({c: float for c in RETURN_COLUMNS})
+        prints = _fingerprints(df)
+
+        with self._lock:
+            if self._prints is not None and prints.sort_index().equals(self._prints):
+                return self._months, self._overall
+
+            if self._prints is None or self._months.empty:
+                changed = prints.index
+            else:
+                old = self._prints.reindex(prints.index)
+                changed = prints.index[~(old == prints).all(axis=1)]
+
+            fresh = summarize(df[df["월구분"].isin(changed)])
+            kept = self._months.loc[self._months.index.isin(prints.index) & ~self._months.index.isin(changed)]
+            months = pd.concat([kept.drop(columns=["누적수익률"], errors="ignore"), fresh]).sort_index()
+
+            # 누적 수익 곡선: 매달 동일 비중으로 투자했을 때 (평균수익률 복리)
+            months["누적수익률"] = ((1 + months["평균수익률"] / 100).cumprod() - 1) * 100
+
+            self._months = months
+            self._prints = prints.sort_index()
+            self._overall = self._overall_summary(months, df)
+            return self._months, self._overall
+
+    @staticmethod
+    def _overall_summary(months, df):
+        # 평균·적중률은 월별 합계로 합치고, 분위수만 전체 열에서 직접 구한다
+        total = months["종목수"].sum()
+        returns = df["측정일대비수익률"].to_numpy()
+        return {
+            "개월수": len(months),
+            "종목수": int(total),
+            "적중률": float(months["적중수"].sum() / total * 100),
+            "평균수익률": float(months["수익률합계"].sum() / total),
+            "중앙수익률": float(np.median(returns)),
+            "최고수익률_분포": {f"p{int(q * 100)}": float(v) for q, v in zip(QUANTILES, np.quantile(df["최고수익률"], QUANTILES))},
+            "최저수익률_분포": {f"p{int(q * 100)}": float(v) for q, v in zip(QUANTILES, np.quantile(df["최저수익률"], QUANTILES))},
+            "누적수익률": float(months["누적수익률"].iloc[-1]),
+        }
+
+
+@st.cache_resource(show_spinner=False)
+def get_engine():
+    return MonthlySummaryEngine()
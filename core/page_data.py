@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+페이지 데이터 계획 (여러 데이터셋을 동시에 받기).
+
+페이지가 필요한 데이터셋을 {이름: (로더, 인자...)} 로 나열하면 제한된 스레드 풀에서 동시에 받는다.
+각 로더는 원래의 캐시(st.cache_data / 디스크 캐시 / single-flight)를 그대로 거치므로
+페이지 지연은 쿼리 시간의 합이 아니라 가장 느린 쿼리 시간이 된다.
+
+    data, errors = page_data.fetch({
+        "prices": (db.load_prices, code),
+        "b_prices": (stock_b_prices, code),
+        "total_return": (partial(db.load_total_return, columns="종목코드, 현재가격"),),
+    })
+
+키워드 인자는 functools.partial 로 넘긴다 (직접 부를 때와 같은 캐시 키가 된다).
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from core import script_ctx
+
+PAGE_DATA_WORKERS = int(os.environ.get("PAGE_DATA_WORKERS", "4"))
+
+# 로더 안에서 db._executor 를 쓰므로 별도 풀 (같은 풀에서 기다리면 교착될 수 있다)
+_executor = ThreadPoolExecutor(max_workers=PAGE_DATA_WORKERS, thread_name_prefix="page-data")
+
+_worker = threading.local()
+
+
+def _run(ctx, loader, args):
+    # 작업 스레드에서도 현재 세션의 실행 컨텍스트를 보이게 해서 st.cache_data 가 경고 없이 동작하도록
+    with script_ctx.attached(ctx):
+        _worker.active = True
+        try:
+            return loader(*args)
+        finally:
+            _worker.active = False
+
+
+def fetch(plan):
+    """
+    plan: {이름: (로더, 인자...)}
+    반환: (결과 dict, 오류 dict) — 실패한 데이터셋은 결과에 없고 오류에 예외가 들어간다.
+    """
+    ctx = script_ctx.current()
+    items = [(name, spec[0], tuple(spec[1:])) for name, spec in plan.items()]
+
+    # 마지막 데이터셋은 현재 스레드에서 직접 받는다.
+    # 이미 작업 스레드 안이면(계획 안의 로더가 또 계획을 쓰는 경우) 풀이 꽉 차 교착되지 않도록 전부 직접 받는다.
+    nested = getattr(_worker, "active", False)
+    futures = {}
+    inline = items if nested else items[-1:]
+    if not nested:
+        for name, loader, args in items[:-1]:
+            futures[name] = _executor.submit(_run, ctx, loader, args)
+
+    data, errors = {}, {}
+    for name, loader, args in inline:
+        try:
+            data[name] = loader(*args)
+        except Exception as e:
+            errors[name] = e
+    for name, future in futures.items():
+        try:
+            data[name] = future.result()
+        except Exception as e:
+            errors[name] = e
+    return data, errors
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+목록 페이지에서 상세 페이지 데이터를 미리 받아 두기 (선택 기능).
+
+PREFETCH_TOP_N 을 1 이상으로 두면 목록 페이지(전체 종목 / 투자 적정 종목 / 월별성과)가
+화면 위쪽 N 개 행(warm_listing)과 방금 선택한 행(open_detail)의 가격 이력·b가격을
+백그라운드에서 캐시에 올려 둔다.
+상세 페이지는 visit() 로 방문을 기록해서, 위쪽 N 개로 미리 받은 종목이 실제로 열렸는지(적중)
+열리지 않고 만료됐는지(낭비) 를 세고 로그로 남긴다 → N 조정용.
+선택한 행은 어차피 열리는 종목이므로 적중/낭비에 넣지 않고 따로(selected) 센다.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from core import db, script_ctx, snapshots
+from core.b_index import stock_b_prices
+
+logger = logging.getLogger(__name__)
+
+# 0 이면 꺼짐
+TOP_N = int(os.environ.get("PREFETCH_TOP_N", "0"))
+# 미리 받은 뒤 이 시간 안에 열리지 않으면 낭비로 센다
+WINDOW_SECONDS = float(os.environ.get("PREFETCH_WINDOW_SECONDS", str(db.CACHE_TTL)))
+
+_lock = threading.Lock()
+_pending = {}  # 종목코드 → 위쪽 N 개로 미리 받은 시각
+_stats = {"prefetched": 0, "selected": 0, "hits": 0, "misses": 0, "wasted": 0}
+# 사용자 요청과 경쟁하지 않도록 작은 별도 풀
+_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="prefetch")
+# 상세 페이지가 이 세션에서 이미 방문으로 센 종목 (위젯으로 다시 실행될 때 중복으로 세지 않도록)
+VISITED_KEY = "_prefetch_visited"
+
+
+def enabled():
+    return TOP_N > 0
+
+
+def _warm(ctx, code):
+    with script_ctx.attached(ctx):
+        try:
+            # 상세 페이지가 읽는 것과 같은 공유 스냅샷에 올린다
+            snapshots.get(db.load_prices, code, "D")
+            stock_b_prices(code)
+        except Exception as e:
+            logger.warning("미리 받기 실패 (%s): %s", code, e)
+
+
+def _expire(now):
+    """WINDOW_SECONDS 가 지나도록 열리지 않은 종목을 낭비로 센다 (_lock 안에서 호출)"""
+    for code, at in list(_pending.items()):
+        if now - at > WINDOW_SECONDS:
+            del _pending[code]
+            _stats["wasted"] += 1
+
+
+def warm(codes):
+    """목록 위쪽 종목코드들의 상세 페이지 데이터를 백그라운드에서 캐시에 올린다 (이미 받아 둔 종목은 건너뜀)."""
+    if not enabled():
+        return
+    ctx = script_ctx.current()
+    now = time.time()
+    with _lock:
+        _expire(now)
+        fresh = []
+        for code in codes:
+            if code and code not in _pending:
+                _pending[code] = now
+                fresh.append(code)
+        _stats["prefetched"] += len(fresh)
+    for code in fresh:
+        _pool.submit(_warm, ctx, code)
+
+
+def warm_listing(df, column="종목코드"):
+    """목록 화면 위쪽 TOP_N 개 행"""
+    if not enabled() or df is None or df.empty or column not in df.columns:
+        return
+    warm([str(c) for c in df[column].head(TOP_N)])
+
+
+def open_detail(code):
+    """
+    목록에서 행을 고른 직후(switch_page 직전) 호출: 그 종목을 바로 받기 시작하고
+    상세 페이지가 이번 진입을 새 방문으로 세도록 한다. 적중/낭비 통계에는 넣지 않는다.
+    """
+    st.session_state.pop(VISITED_KEY, None)
+    if not enabled() or not code:
+        return
+    with _lock:
+        _stats["selected"] += 1
+    _pool.submit(_warm, script_ctx.current(), code)
+
+
+def visit(code):
+    """
+    상세 페이지 진입 기록 — 위쪽 N 개로 미리 받은 종목이면 적중, 아니면 실패로 세고 적중률을 로그로 남긴다.
+    같은 종목에 머무는 동안(위젯으로 다시 실행) 은 한 번만 센다.
+    """
+    if st.session_state.get(VISITED_KEY) == code:
+        return
+    st.session_state[VISITED_KEY] = code
+    if not enabled():
+        return
+    with _lock:
+        _expire(time.time())
+        hit = _pending.pop(code, None) is not None
+        _stats["hits" if hit else "misses"] += 1
+        s = dict(_stats)
+    visits = s["hits"] + s["misses"]
+    logger.info(
+        "prefetch %s: %s (적중률 %.0f%%, 미리 받음 %d, 낭비 %d, 선택 %d, N=%d)",
+        "hit" if hit else "miss", code, s["hits"] / visits * 100, s["prefetched"], s["wasted"], s["selected"], TOP_N,
+    )
+
+
+def stats():
+    with _lock:
+        return dict(_stats)
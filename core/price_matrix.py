@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+전 종목 종가 행렬 (날짜 × 종목, float32).
+
+여러 종목을 .in_("종목코드", 묶음) 요청으로 동시에 받아 거래일 기준으로 맞춘 조밀한 행렬을 만든다.
+(스크리닝, 상관계수, 수익률 재계산처럼 종목을 가로질러 보는 계산용)
+
+<PRICE_MATRIX_DIR>/<백엔드>/ 아래에 .npy 로 저장해서 np.load(mmap_mode="r") 로 바로 연다.
+  closes.npy : float32 [날짜 수, 종목 수], 값이 없는 칸은 NaN
+  dates.npy  : datetime64[D] [날짜 수]
+  codes.npy  : 종목코드 문자열 [종목 수]
+"""
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from core import db
+
+MATRIX_DIR = os.environ.get(
+    "PRICE_MATRIX_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "matrix"),
+)
+FILES = ("closes", "dates", "codes")
+
+_lock = threading.Lock()
+
+
+class PriceMatrix:
+    """closes[i, j] = dates[i] 의 codes[j] 종가"""
+
+    def __init__(self, dates, codes, closes):
+        self.dates = dates
+        self.codes = codes
+        self.closes = closes
+        self._col = {code: j for j, code in enumerate(codes.tolist())}
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def nbytes(self):
+        return self.closes.nbytes
+
+    def column(self, code):
+        """종목 하나의 종가 열 (없는 종목이면 None)"""
+        j = self._col.get(code)
+        return None if j is None else self.closes[:, j]
+
+    def frame(self):
+        """pandas DataFrame (index 날짜, columns 종목코드) — 복사 없이 감싼다"""
+        return pd.DataFrame(self.closes, index=pd.DatetimeIndex(self.dates, name="날짜"), columns=self.codes)
+
+
+def from_rows(rows, codes=None):
+    """(종목코드, 날짜, 종가) 행들 → PriceMatrix. codes 를 주면 그 순서대로 열을 만든다."""
+    df = pd.DataFrame(rows, columns=["종목코드", "날짜", "종가"])
+    dates = np.unique(pd.to_datetime(df["날짜"]).to_numpy().astype("datetime64[D]"))
+    if codes is None:
+        codes = np.unique(df["종목코드"].astype(str).to_numpy())
+    codes = np.asarray(codes, dtype=str)
+
+    closes = np.full((len(dates), len(codes)), np.nan, dtype=np.float32)
+    if not df.empty:
+        row_idx = np.searchsorted(dates, pd.to_datetime(df["날짜"]).to_numpy().astype("datetime64[D]"))
+        col_of = pd.Index(codes).get_indexer(df["종목코드"].astype(str))
+        ok = col_of >= 0
+        closes[row_idx[ok], col_of[ok]] = df["종가"].to_numpy(dtype=np.float32)[ok]
+    return PriceMatrix(dates, codes, closes)
+
+
+def _dir():
+    return os.path.join(MATRIX_DIR, db.backend_key() or "default")
+
+
+def _write(matrix):
+    os.makedirs(_dir(), exist_ok=True)
+    arrays = {"closes": matrix.closes, "dates": matrix.dates, "codes": matrix.codes}
+    for name in FILES:
+        path = os.path.join(_dir(), f"{name}.npy")
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp.npy"
+        np.save(tmp, arrays[name])
+        os.replace(tmp, path)
+
+
+def read(mmap=True):
+    """저장된 행렬 (없으면 None). mmap=True 이면 종가 배열은 디스크에 매핑된 읽기 전용 배열."""
+    paths = [os.path.join(_dir(), f"{name}.npy") for name in FILES]
+    if not all(os.path.exists(p) for p in paths):
+        return None
+    closes = np.load(paths[0], mmap_mode="r" if mmap else None)
+    return PriceMatrix(np.load(paths[1]), np.load(paths[2]), closes)
+
+
+def all_codes():
+    df = db.load_stock_names()
+    return sorted(df["종목코드"].astype(str).unique()) if not df.empty else []
+
+
+def build(codes=None):
+    """codes (기본: total_return 의 전 종목) 의 전체 이력을 받아 행렬을 새로 만든다."""
+    codes = list(codes) if codes is not None else all_codes()
+    with _lock:
+        matrix = from_rows(db.fetch_price_rows_bulk(codes), codes)
+        _write(matrix)
+    return read()
+
+
+def sync():
+    """
+    저장된 행렬 이후의 새 거래일만 받아 아래에 붙인다 (종목 구성이 바뀌었으면 새로 만든다).
+    """
+    stored = read(mmap=False)
+    codes = all_codes()
+    if stored is None or len(stored) == 0 or stored.codes.tolist() != codes:
+        return build(codes)
+
+    last = str(stored.dates[-1])
+    with _lock:
+        delta = db.fetch_price_rows_bulk(codes, after=last)
+        if not delta:
+            return read()
+        new = from_rows(delta, stored.codes)
+        _write(PriceMatrix(
+            np.concatenate([stored.dates, new.dates]),
+            stored.codes,
+            np.concatenate([stored.closes, new.closes]),
+        ))
+    return read()
+
+
+@st.cache_resource(ttl=db.CACHE_TTL, show_spinner=False)
+def get_price_matrix():
+    """프로세스 전체가 공유하는 종가 행렬 (디스크에 매핑, 새 거래일만 추가로 받는다)"""
+    return sync()
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+로컬 컬럼형(Parquet) prices 저장소.
+
+종목코드마다 파일 하나(<PRICE_STORE_DIR>/<종목코드>.parquet)에 날짜/종가를 보관하고,
+동기화할 때는 저장된 마지막 날짜 이후의 행만 Supabase 에서 받아 덧붙인다.
+주봉/월봉 OHLC(<종목코드>.W.parquet, <종목코드>.M.parquet)도 같이 갱신해 둔다.
+→ 재시작이나 캐시 만료 후에도 전체 이력 대신 하루치 정도의 작은 요청만 발생한다.
+"""
+import os
+import threading
+
+import pandas as pd
+
+from core import db
+from core.chart_data import period_start, resample_ohlc
+
+STORE_DIR = os.environ.get(
+    "PRICE_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "prices"),
+)
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def enabled():
+    """
+    PRICE_STORE_DIR 를 빈 문자열로 두면 로컬 저장소를 쓰지 않는다.
+    메모리 백엔드처럼 영속 저장할 수 없는 백엔드에서도 꺼진다.
+    """
+    return bool(STORE_DIR) and db.backend_key() is not None
+
+
+def _store_dir():
+    # 백엔드별로 디렉터리를 나눠서 (예: 운영 Supabase / 로컬 SQLite) 데이터가 섞이지 않게 한다
+    return os.path.join(STORE_DIR, db.backend_key() or "default")
+
+
+def _lock_for(code):
+    with _locks_guard:
+        return _locks.setdefault(code, threading.Lock())
+
+
+def _path(code, resolution="D"):
+    safe = "".join(ch for ch in str(code) if ch.isalnum() or ch in "-_")
+    suffix = "" if resolution == "D" else f".{resolution}"
+    return os.path.join(_store_dir(), f"{safe}{suffix}.parquet")
+
+
+def _to_frame(rows):
+    df = pd.DataFrame(rows, columns=["날짜", "종가"]) if rows else pd.DataFrame(columns=["날짜", "종가"])
+    df["날짜"] = pd.to_datetime(df["날짜"])
+    return df
+
+
+def read(code, resolution="D"):
+    """저장된 가격 이력 (없으면 None)"""
+    path = _path(code, resolution)
+    if not os.path.exists(path):
+        return None
+    try:
+        return pd.read_parquet(path)
+    except Exception:
+        # 깨진 파일은 지우고 다시 만든다
+        os.remove(path)
+        return None
+
+
+def _write(code, df, resolution="D"):
+    os.makedirs(_store_dir(), exist_ok=True)
+    path = _path(code, resolution)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    df.to_parquet(tmp, index=False)
+    # 같은 호스트의 다른 프로세스가 읽는 중이어도 안전하도록 원자적 교체
+    os.replace(tmp, path)
+
+
+def _update_aggregates(code, daily, first_new):
+    """
+    주봉/월봉 갱신. first_new(새로 들어온 첫 날짜)가 속한 기간부터만 다시 집계한다.
+    first_new 가 None 이면 전체 재집계.
+    """
+    for resolution in ("W", "M"):
+        stored = None if first_new is None else read(code, resolution)
+        if stored is None:
+            agg = resample_ohlc(daily, resolution)
+        else:
+            start = period_start(first_new, resolution)
+            agg = pd.concat(
+                [stored[stored["날짜"] < start], resample_ohlc(daily[daily["날짜"] >= start], resolution)],
+                ignore_index=True,
+            )
+        _write(code, agg, resolution)
+
+
+def sync(code, full=False):
+    """
+    저장소를 최신으로 맞추고 전체 이력을 반환한다 (날짜 오름차순).
+    full=True 이면 저장본을 무시하고 전체를 다시 받는다 (과거 데이터가 수정된 경우).
+    """
+    with _lock_for(code):
+        stored = None if full else read(code)
+
+        if stored is None or stored.empty:
+            df = _to_frame(db.fetch_price_rows(code))
+            changed, first_new = True, None
+        else:
+            last = stored["날짜"].max().strftime("%Y-%m-%d")
+            delta = db.fetch_price_rows_keyset(code, after=last)
+            changed, df, first_new = bool(delta), stored, None
+            if delta:
+                new_rows = _to_frame(delta)
+                first_new = new_rows["날짜"].min()
+                df = pd.concat([stored, new_rows], ignore_index=True)
+
+        if changed and not df.empty:
+            df = df.sort_values("날짜").drop_duplicates("날짜", keep="last").reset_index(drop=True)
+            _write(code, df)
+            _update_aggregates(code, df, first_new)
+        return df
+
+
+def load(code, resolution="D"):
+    """
+    해상도별 가격 이력 ("D" 일봉, "W" 주봉, "M" 월봉). 일봉을 먼저 동기화한다.
+    """
+    daily = sync(code)
+    if resolution == "D" or daily.empty:
+        return daily
+    return aggregate(code, resolution, daily)
+
+
+def aggregate(code, resolution, daily):
+    """저장된 주봉/월봉 (없거나 일봉보다 뒤처져 있으면 다시 만든다)"""
+    agg = read(code, resolution)
+    if agg is None or agg.empty or agg["날짜"].max() < daily["날짜"].max():
+        with _lock_for(code):
+            _update_aggregates(code, daily, None)
+        agg = read(code, resolution)
+    return agg
+
+
+def clear(code=None):
+    """저장본 삭제 (code 가 없으면 전체)"""
+    if code is not None:
+        paths = [_path(code, resolution) for resolution in ("D", "W", "M")]
+    elif os.path.isdir(_store_dir()):
+        paths = [os.path.join(_store_dir(), f) for f in os.listdir(_store_dir()) if f.endswith(".parquet")]
+    else:
+        paths = []
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+total_return / b_return(눌림) / b_return_shoot(돌파) 로컬 재계산 엔진.
+
+prices 종가 행렬(core.price_matrix) + bt_points 로 세 테이블을 직접 계산한다.
+  total_return   : 시작가격(첫 종가), 현재가격(마지막 종가), 수익률(%)
+  b_return       : 종가가 b가격 위에서 내려와 닿은(눌림) 가장 최근 날 → 발생일, 그날 종가 대비 현재 수익률
+  b_return_shoot : 종가가 b가격 아래에서 올라서 넘은(돌파) 가장 최근 날 → 발생일, 그날 종가 대비 현재 수익률
+출력 컬럼은 각 테이블과 같아서 페이지가 그대로 쓸 수 있다 (RANKINGS_SOURCE=local).
+
+- 계산은 (종목, b가격) 쌍 전체를 한 번에 비교하는 NumPy 벡터 연산
+- 종목이 많으면 종목 묶음(shard)별로 프로세스 풀에 나눠 계산
+- 새 거래일이 들어오면 이전 마지막 행 + 새 행만 비교해서 갱신 (전체 재계산 없음)
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from core import db
+
+logger = logging.getLogger(__name__)
+
+ENGINE_WORKERS = int(os.environ.get("RANK_ENGINE_WORKERS", str(min(4, os.cpu_count() or 1))))
+SHARD_SIZE = int(os.environ.get("RANK_ENGINE_SHARD_SIZE", "250"))
+# 이보다 종목이 적으면 프로세스를 띄우는 비용이 더 크므로 현재 프로세스에서 계산
+PARALLEL_MIN_STOCKS = int(os.environ.get("RANK_ENGINE_PARALLEL_MIN", "1000"))
+
+TOTAL_RETURN_COLUMNS = ["종목코드", "종목명", "시작가격", "현재가격", "수익률"]
+B_RETURN_COLUMNS = ["종목명", "종목코드", "수익률", "발생일", "구분"]
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _ffill(block):
+    """열(종목)마다 NaN 을 바로 위 값으로 채운다"""
+    mask = np.isnan(block)
+    if not mask.any():
+        return block
+    idx = np.where(~mask, np.arange(len(block))[:, None], 0)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    return block[idx, np.arange(block.shape[1])]
+
+
+def last_crossings(block, pair_col, levels):
+    """
+    block: [T, S] 종가 (앞에서 채운 값), pair_col/levels: (종목 열, b가격) 쌍.
+    반환: (돌파, 눌림) 종목별 마지막 발생 행 번호 (1..T-1, 없으면 -1)
+    """
+    n_cols = block.shape[1]
+    up_out = np.full(n_cols, -1, dtype=np.int64)
+    down_out = np.full(n_cols, -1, dtype=np.int64)
+    if len(block) < 2 or len(pair_col) == 0:
+        return up_out, down_out
+
+    x = block[:, pair_col]
+    prev, cur = x[:-1], x[1:]
+    lv = levels[None, :]
+    rows = np.arange(1, len(block))[:, None]
+    up = np.where((prev < lv) & (cur >= lv), rows, -1).max(axis=0)
+    down = np.where((prev > lv) & (cur <= lv), rows, -1).max(axis=0)
+    np.maximum.at(up_out, pair_col, up)
+    np.maximum.at(down_out, pair_col, down)
+    return up_out, down_out
+
+
+def _scan_shard(block, pair_col, levels):
+    """
+    프로세스 풀 작업 단위: 한 묶음의 종가 블록 →
+    (채운 마지막 행, 돌파 행, 눌림 행, 돌파일 종가, 눌림일 종가)
+    """
+    filled = _ffill(block)
+    up, down = last_crossings(filled, pair_col, levels)
+    cols = np.arange(block.shape[1])
+    return filled[-1], up, down, filled[np.maximum(up, 0), cols], filled[np.maximum(down, 0), cols]
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Streamlit 서버는 스레드가 많아서 fork 대신 spawn
+            _pool = ProcessPoolExecutor(max_workers=ENGINE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+class RankingEngine:
+    """세 테이블의 상태(종목별 시작/마지막 종가, 마지막 눌림/돌파)를 보관하고 새 거래일만 반영한다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.dates = None
+        self.codes = None
+        self._levels_key = None
+
+    # ------------------------------------------------
+    # 입력 준비
+    # ------------------------------------------------
+    def _set_levels(self, codes, df_b):
+        b = df_b[["종목코드", "b가격"]].dropna()
+        b = b[b["b가격"] > 0]
+        col = pd.Index(codes).get_indexer(b["종목코드"].astype(str))
+        keep = col >= 0
+        order = np.argsort(col[keep], kind="stable")
+        self._pair_col = col[keep][order]
+        self._levels = b["b가격"].to_numpy(dtype=np.float32)[keep][order]
+        self._levels_key = (tuple(codes), self._pair_col.tobytes(), self._levels.tobytes())
+
+    def _shards(self, block):
+        """(열 범위, 블록 조각, 그 조각의 쌍) 목록"""
+        out = []
+        starts = np.searchsorted(self._pair_col, np.arange(0, block.shape[1] + SHARD_SIZE, SHARD_SIZE))
+        for k, c0 in enumerate(range(0, block.shape[1], SHARD_SIZE)):
+            c1 = min(c0 + SHARD_SIZE, block.shape[1])
+            p0, p1 = starts[k], starts[k + 1]
+            out.append((c0, c1, np.ascontiguousarray(block[:, c0:c1]), self._pair_col[p0:p1] - c0, self._levels[p0:p1]))
+        return out
+
+    def _scan(self, block):
+        shards = self._shards(block)
+        if block.shape[1] >= PARALLEL_MIN_STOCKS and len(shards) > 1 and ENGINE_WORKERS > 1:
+            pool = _get_pool()
+            futures = [pool.submit(_scan_shard, part, pc, lv) for _, _, part, pc, lv in shards]
+            results = [f.result() for f in futures]
+        else:
+            results = [_scan_shard(part, pc, lv) for _, _, part, pc, lv in shards]
+        return [np.concatenate(parts) for parts in zip(*results)]
+
+    # ------------------------------------------------
+    # 전체 계산 / 증분 갱신
+    # ------------------------------------------------
+    def rebuild(self, matrix, df_b, names):
+        closes = np.asarray(matrix.closes, dtype=np.float32)
+        codes = [str(c) for c in matrix.codes.tolist()]
+        self._set_levels(codes, df_b)
+
+        valid = ~np.isnan(closes)
+        has = valid.any(axis=0)
+        first_row = valid.argmax(axis=0)
+        self.first = np.where(has, closes[first_row, np.arange(len(codes))], np.nan).astype(np.float32)
+
+        last, up, down, up_price, down_price = self._scan(closes)
+        self.last = last
+        self.up_idx, self.down_idx = np.where(up > 0, up, -1), np.where(down > 0, down, -1)
+        self.up_price, self.down_price = up_price, down_price
+        self.dates = np.asarray(matrix.dates)
+        self.codes = codes
+        self.names = names
+
+    def update(self, matrix, df_b, names):
+        """
+        matrix 가 이전 계산에 새 거래일만 덧붙인 것이면 그 행만 반영하고,
+        종목/b가격 구성이 바뀌었거나 처음이면 전체를 다시 계산한다.
+        """
+        with self._lock:
+            codes = [str(c) for c in matrix.codes.tolist()]
+            n_old = 0 if self.dates is None else len(self.dates)
+            same_levels = self._levels_key is not None and self._levels_key[0] == tuple(codes)
+            if same_levels:
+                old_key = self._levels_key
+                self._set_levels(codes, df_b)
+                same_levels = self._levels_key == old_key
+            incremental = (
+                same_levels
+                and n_old > 0
+                and len(matrix.dates) >= n_old
+                and matrix.dates[n_old - 1] == self.dates[-1]
+            )
+            if not incremental:
+                self.rebuild(matrix, df_b, names)
+                return self
+            self.names = names
+            if len(matrix.dates) == n_old:
+                return self
+
+            new = np.asarray(matrix.closes[n_old:], dtype=np.float32)
+            # 이전 마지막 행(채운 값) + 새 행 → 새 행에서의 교차만 찾는다
+            block = np.vstack([self.last[None, :], new])
+            last, up, down, up_price, down_price = self._scan(block)
+            offset = n_old - 1
+
+            self.first = np.where(np.isnan(self.first), _first_valid(new), self.first).astype(np.float32)
+            self.last = last
+            self.up_price = np.where(up > 0, up_price, self.up_price)
+            self.down_price = np.where(down > 0, down_price, self.down_price)
+            self.up_idx = np.where(up > 0, up + offset, self.up_idx)
+            self.down_idx = np.where(down > 0, down + offset, self.down_idx)
+            self.dates = np.asarray(matrix.dates)
+            return self
+
+    # ------------------------------------------------
+    # 출력 (테이블과 같은 컬럼, 수익률 내림차순)
+    # ------------------------------------------------
+    def total_return(self):
+        ok = ~np.isnan(self.first) & ~np.isnan(self.last) & (self.first > 0)
+        codes = np.asarray(self.codes)[ok]
+        first, last = self.first[ok].astype(float), self.last[ok].astype(float)
+        df = pd.DataFrame({
+            "종목코드": codes,
+            "종목명": [self.names.get(c, c) for c in codes],
+            "시작가격": first,
+            "현재가격": last,
+            "수익률": np.round((last - first) / first * 100, 2),
+        })
+        return df.sort_values("수익률", ascending=False, kind="stable").reset_index(drop=True)[TOTAL_RETURN_COLUMNS]
+
+    def _events(self, idx, price, kind):
+        ok = (idx >= 0) & (price > 0) & ~np.isnan(self.last)
+        codes = np.asarray(self.codes)[ok]
+        base, last = price[ok].astype(float), self.last[ok].astype(float)
+        df = pd.DataFrame({
+            "종목명": [self.names.get(c, c) for c in codes],
+            "종목코드": codes,
+            "수익률": np.round((last - base) / base * 100, 2),
+            "발생일": pd.to_datetime(self.dates[idx[ok]]).strftime("%Y-%m-%d"),
+            "구분": kind,
+        })
+        return df.sort_values("수익률", ascending=False, kind="stable").reset_index(drop=True)[B_RETURN_COLUMNS]
+
+    def b_return(self):
+        return self._events(self.down_idx, self.down_price, "눌림")
+
+    def b_return_shoot(self):
+        return self._events(self.up_idx, self.up_price, "돌파")
+
+
+def _first_valid(block):
+    valid = ~np.isnan(block)
+    row = valid.argmax(axis=0)
+    return np.where(valid.any(axis=0), block[row, np.arange(block.shape[1])], np.nan)
+
+
+@st.cache_resource(show_spinner=False)
+def _engine():
+    return RankingEngine()
+
+
+@st.cache_data(ttl=db.CACHE_TTL, show_spinner=False)
+def load_local_tables():
+    """
+    {"total_return", "b_return", "b_return_shoot"} 로컬 계산 결과.
+    가격 행렬은 새 거래일만 받아 붙이고(price_matrix.sync), 엔진도 그 행만 반영한다.
+    """
+    from core import price_matrix
+
+    matrix = price_matrix.sync()
+    df_b = db.load_bt_points(columns="종목코드, b가격")
+    # 종목명은 가격에 없으므로 종목 목록(total_return)에서 가져온다
+    df_names = db.load_stock_names()
+    names = dict(zip(df_names["종목코드"].astype(str), df_names["종목명"])) if not df_names.empty else {}
+
+    engine = _engine().update(matrix, df_b, names)
+    return {
+        "total_return": engine.total_return(),
+        "b_return": engine.b_return(),
+        "b_return_shoot": engine.b_return_shoot(),
+    }
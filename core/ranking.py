@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+상위 K / 하위 K 순위 조회.
+
+테이블 전체를 받아 정렬하는 대신, DB 에 "내림차순 limit K" 와 "오름차순 limit K"
+두 개의 작은 쿼리를 동시에 보낸다. 이미 메모리에 있는 DataFrame 은 nlargest / nsmallest 로 처리.
+"""
+import pandas as pd
+import streamlit as st
+
+from core import db, disk_cache
+
+# 카테고리 → (테이블, 순위 기준 컬럼, 가져올 컬럼)
+RANKINGS = {
+    "스윙": ("total_return", "수익률", "종목명, 종목코드, 수익률"),
+    "눌림": ("b_return", "수익률", "종목명, 종목코드, 수익률, 발생일, 구분"),
+    "돌파": ("b_return_shoot", "수익률", "종목명, 종목코드, 수익률, 발생일, 구분"),
+    "월별": ("b_zone_monthly_tracking", "측정일대비수익률", "종목명, 종목코드, 측정일대비수익률, 월구분"),
+}
+
+# RANKINGS_SOURCE=local 일 때 DB 대신 쓰는 로더 (core.rank_engine 계산 결과)
+LOCAL_LOADERS = {
+    "total_return": lambda: db.load_total_return(),
+    "b_return": lambda: db.load_b_return(limit=None),
+    "b_return_shoot": lambda: db.load_b_return_shoot(limit=None),
+}
+
+
+def _ranked_query(table, column, columns, k, desc, filters):
+    query = db.get_client().table(table).select(columns)
+    for key, value in filters:
+        query = query.eq(key, value)
+    # NULL 은 순위에서 제외되도록 항상 뒤로
+    return query.order(column, desc=desc, nullsfirst=False).limit(k).execute().data
+
+
+def _clean(rows, column, ascending):
+    df = pd.DataFrame(rows)
+    if df.empty:
+        return df
+    df[column] = df[column].astype(float)
+    df = df[df[column].notna()]
+    return df.sort_values(column, ascending=ascending, kind="stable").reset_index(drop=True)
+
+
+@st.cache_data(ttl=db.CACHE_TTL)
+@disk_cache.cached(ttl=db.CACHE_TTL, tables=tuple(table for table, _, _ in RANKINGS.values()))
+def load_top_bottom(category: str, k: int = 5, filters: tuple = ()) -> tuple:
+    """
+    (상위 K, 하위 K) DataFrame 두 개. 각각 순위 순서 (인덱스 0 = 1위).
+    filters: (("월구분", "2024-05-01"),) 처럼 eq 조건 튜플 (캐시 키로 쓰이므로 튜플)
+    """
+    table, column, columns = RANKINGS[category]
+    if db.RANKINGS_SOURCE == "local" and table in LOCAL_LOADERS and not filters:
+        # 로컬 엔진이 계산한 테이블은 이미 메모리에 있다
+        return top_bottom_frame(LOCAL_LOADERS[table](), column, k)
+    top_future = db._executor.submit(_ranked_query, table, column, columns, k, True, filters)
+    bottom_future = db._executor.submit(_ranked_query, table, column, columns, k, False, filters)
+    top = _clean(top_future.result(), column, ascending=False)
+    bottom = _clean(bottom_future.result(), column, ascending=True)
+    return top, bottom
+
+
+def top_bottom_frame(df, column, k=5):
+    """메모리에 있는 DataFrame 의 (상위 K, 하위 K) — 전체 정렬 없이 nlargest / nsmallest"""
+    values = df.assign(**{column: df[column].astype(float)})
+    top = values.nlargest(k, column).reset_index(drop=True)
+    bottom = values.nsmallest(k, column).reset_index(drop=True)
+    return top, bottom
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+stale-while-revalidate 백그라운드 갱신기.
+
+disk_cache.cached 로더가 호출될 때마다 (로더, 인자) 를 "최근에 쓰인 키" 로 기록해 두고,
+백그라운드 스레드가 TTL 이 끝나기 전에(또는 데이터 버전이 바뀌면) 그 키들을 미리 다시 받아
+디스크 캐시에 넣는다.
+(total_return / b_return / b_return_shoot / 월별 추적, 최근 본 종목의 가격 이력 등)
+
+TTL 이 지난 항목도 DISK_CACHE_STALE_SECONDS 동안은 지우지 않고 그대로 돌려주며,
+새 데이터는 뒤에서 받는다 → 사용자 요청이 차가운 조회를 기다리는 일이 없다.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from core import disk_cache, singleflight
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.environ.get("CACHE_REFRESH", "1") != "0"
+# TTL 의 이 비율이 지나면 미리 갱신 (0.8 → 300초 TTL 이면 240초 뒤)
+REFRESH_AT = float(os.environ.get("CACHE_REFRESH_AT", "0.8"))
+# 이 시간 안에 한 번이라도 읽힌 키만 갱신한다
+HOT_SECONDS = float(os.environ.get("CACHE_HOT_SECONDS", "1800"))
+# 기억해 둘 최대 키 개수 (오래 안 쓰인 것부터 잊는다)
+MAX_HOT_KEYS = int(os.environ.get("CACHE_HOT_KEYS", "200"))
+CHECK_INTERVAL = float(os.environ.get("CACHE_REFRESH_INTERVAL", "15"))
+
+_hot = OrderedDict()  # 기본 키 → [fn, args, kwargs, tables, ttl, 마지막 읽은 시각]
+_hot_lock = threading.Lock()
+_running = set()
+_running_lock = threading.Lock()
+_started = False
+# db._executor 를 쓰는 로더를 돌리므로 별도 풀 (같은 풀에서 기다리면 교착될 수 있다)
+_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-refresh")
+
+
+def touch(key, fn, args, kwargs, tables, ttl):
+    """로더가 읽힐 때마다 호출 — 갱신 대상으로 기록하고, 처음이면 스레드를 띄운다."""
+    if not ENABLED:
+        return
+    with _hot_lock:
+        _hot[key] = [fn, args, kwargs, tables, ttl, time.time()]
+        _hot.move_to_end(key)
+        while len(_hot) > MAX_HOT_KEYS:
+            _hot.popitem(last=False)
+    _ensure_started()
+
+
+def schedule(key):
+    """key 를 백그라운드에서 다시 받는다 (이미 진행 중이면 무시)."""
+    with _running_lock:
+        if key in _running:
+            return
+        _running.add(key)
+    _pool.submit(_refresh, key)
+
+
+def _refresh(key):
+    try:
+        with _hot_lock:
+            entry = _hot.get(key)
+        if entry is None:
+            return
+        fn, args, kwargs, tables, ttl, _ = entry
+        full_key, key_ttl = disk_cache.resolve(key, tables, ttl)
+        # 다른 프로세스가 방금 갱신했으면 건너뛴다
+        created = disk_cache.created_at(full_key)
+        if created is not None and time.time() - created < key_ttl * REFRESH_AT:
+            return
+        name = f"{fn.__module__}.{fn.__qualname__}"
+        value = singleflight.do(name, key, fn, *args, **kwargs)
+        disk_cache.put(full_key, value, key_ttl + disk_cache.STALE_SECONDS, base=key)
+    except Exception as e:
+        logger.warning("캐시 갱신 실패 (%s): %s", key, e)
+    finally:
+        with _running_lock:
+            _running.discard(key)
+
+
+def _loop():
+    while True:
+        time.sleep(CHECK_INTERVAL)
+        now = time.time()
+        with _hot_lock:
+            items = [(k, v[3], v[4], v[5]) for k, v in _hot.items()]
+        for key, tables, ttl, last_read in items:
+            if now - last_read > HOT_SECONDS:
+                continue
+            try:
+                full_key, key_ttl = disk_cache.resolve(key, tables, ttl)
+                created = disk_cache.created_at(full_key)
+            except Exception as e:
+                logger.warning("캐시 상태 확인 실패 (%s): %s", key, e)
+                continue
+            # 없으면 데이터 버전이 바뀌었거나 밀려난 것 → 미리 받아 둔다
+            if created is None or now - created >= key_ttl * REFRESH_AT:
+                schedule(key)
+
+
+def _ensure_started():
+    global _started
+    if _started:
+        return
+    with _hot_lock:
+        if _started:
+            return
+        threading.Thread(target=_loop, name="cache-refresher", daemon=True).start()
+        _started = True
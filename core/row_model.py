@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+전체 종목 표의 서버 쪽 페이지 조회 (정렬 / 검색 / offset-limit).
+
+표에는 한 페이지 분량만 보낸다. 요청은 (offset, limit, 정렬 컬럼, 내림차순, 검색어) 로 받고
+  - 미리 정렬해 둔 메모리 색인(SortedIndex)이 있으면 거기서 바로 잘라 주고
+  - 아직 없으면(콜드) 해당 페이지만 Supabase 에 order + range 로 요청하면서 색인은 뒤에서 만든다.
+종목 수가 늘어도 (해외 시장 추가 등) 브라우저로 가는 행 수와 렌더링 비용은 페이지 크기로 고정된다.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from core import db, schema
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ["종목코드", "종목명", "시작가격", "현재가격", "수익률"]
+SORTABLE = ["수익률", "현재가격", "시작가격", "종목명", "종목코드"]
+
+_latest = None  # (만든 시각, SortedIndex)
+_latest_lock = threading.Lock()
+_building = threading.Event()
+_build_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="row-index")
+
+
+class SortedIndex:
+    """total_return 전체 + 정렬 컬럼별 행 순서(argsort, 처음 요청될 때 한 번 계산)"""
+
+    def __init__(self, df):
+        self.df = df[[c for c in COLUMNS if c in df.columns]].reset_index(drop=True)
+        self._orders = {}
+        self._lock = threading.Lock()
+        self._names = self.df["종목명"].astype(str).str.lower().to_numpy(dtype=object)
+        self._codes = self.df["종목코드"].astype(str).to_numpy(dtype=object)
+
+    def __len__(self):
+        return len(self.df)
+
+    def order(self, column, descending):
+        """정렬된 행 번호 (NULL 은 항상 뒤로). 오름차순 순서만 저장하고 내림차순은 뒤집어 쓴다."""
+        with self._lock:
+            asc = self._orders.get(column)
+            if asc is None:
+                values = self.df[column]
+                if isinstance(values.dtype, pd.CategoricalDtype):
+                    values = values.astype(str)
+                asc = np.argsort(values.to_numpy(), kind="stable")
+                asc.setflags(write=False)
+                self._orders[column] = asc
+        if not descending:
+            return asc
+        # 내림차순: NULL 을 뒤에 두도록 NULL 이 아닌 부분만 뒤집는다
+        isnull = self.df[column].isna().to_numpy()[asc]
+        n_null = int(isnull.sum())
+        valid = asc[:len(asc) - n_null] if n_null else asc
+        return np.concatenate([valid[::-1], asc[len(asc) - n_null:]]) if n_null else valid[::-1]
+
+    def window(self, offset, limit, sort="수익률", descending=True, query=""):
+        """(페이지 DataFrame, 검색 조건에 맞는 전체 행 수)"""
+        rows = self.order(sort, descending)
+        query = query.strip().lower()
+        if query:
+            # fetch_window_remote 와 같은 규칙: 숫자면 종목코드 앞부분, 아니면 종목명 부분 일치
+            if query.isdigit():
+                hit = np.fromiter((c.startswith(query) for c in self._codes), dtype=bool, count=len(self._codes))
+            else:
+                hit = np.fromiter((query in n for n in self._names), dtype=bool, count=len(self._names))
+            rows = rows[hit[rows]]
+        return self.df.take(rows[offset:offset + limit]).reset_index(drop=True), len(rows)
+
+
+def _build():
+    global _latest
+    try:
+        # st.cache_data 를 거치지 않고 공유 스냅샷과 같은 경로(타입 변환 → 디스크 캐시 → 조회)로 받는다
+        df = db.load_total_return.__wrapped__(columns=", ".join(COLUMNS))
+        index = SortedIndex(df)
+        index.order("수익률", True)
+        with _latest_lock:
+            _latest = (time.monotonic(), index)
+        return index
+    except Exception as e:
+        logger.warning("종목 색인 만들기 실패: %s", e)
+    finally:
+        _building.clear()
+
+
+def _schedule_build():
+    if not _building.is_set():
+        _building.set()
+        _build_pool.submit(_build)
+
+
+def warm_index():
+    """색인 (아직 없거나 오래됐으면 None, 그 경우 뒤에서 다시 만든다)"""
+    latest = _latest
+    if latest is not None and time.monotonic() - latest[0] < db.CACHE_TTL:
+        return latest[1]
+    _schedule_build()
+    return latest[1] if latest is not None else None
+
+
+@st.cache_data(ttl=db.CACHE_TTL, show_spinner=False)
+def fetch_window_remote(offset, limit, sort="수익률", descending=True, query=""):
+    """색인이 없을 때: 해당 페이지만 DB 에 요청 (정렬 / 검색 / range + 전체 건수)"""
+    q = db.get_client().table("total_return").select(", ".join(COLUMNS), count="exact")
+    query = query.strip()
+    if query:
+        # 숫자면 종목코드 앞부분, 아니면 종목명 부분 일치
+        q = q.ilike("종목코드", f"{query}%") if query.isdigit() else q.ilike("종목명", f"%{query}%")
+    res = q.order(sort, desc=descending, nullsfirst=False).range(offset, offset + limit - 1).execute()
+    df = schema.normalize(pd.DataFrame(res.data, columns=COLUMNS), "total_return")
+    return df, res.count if res.count is not None else len(df)
+
+
+def load_window(offset, limit, sort="수익률", descending=True, query=""):
+    """
+    (페이지 DataFrame, 전체 행 수, 출처 "index" | "db")
+    RANKINGS_SOURCE=local 이면 데이터가 이미 로컬에 있으므로 항상 색인을 쓴다.
+    """
+    index = warm_index()
+    if index is None and db.RANKINGS_SOURCE == "local":
+        index = _build()
+    if index is not None:
+        page, total = index.window(offset, limit, sort, descending, query)
+        return page, total, "index"
+    page, total = fetch_window_remote(offset, limit, sort, descending, query)
+    return page, total, "db"
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+테이블별 컬럼 타입 등록부.
+
+JSON 그대로 만든 DataFrame(object 문자열, float64/문자열 숫자)을 로더에서 한 번만 작은 타입으로 바꾼다.
+  - 종목명 / 종목코드 / 구분 / 화면에 문자열로 보이는 날짜(발생일, 측정일, 월구분) → category
+  - 원 단위 가격 (정수) → float32 (16,777,216원 까지 정확)
+  - 소수 둘째 자리 수익률 → float64 (float32 로 두면 그리드에 12.3400001526 처럼 보인다)
+  - 차트 x 축 날짜 → datetime64
+페이지는 다시 astype 하지 않는다. 캐시 항목별 메모리 크기는 memory_report() 로 확인.
+"""
+import functools
+import threading
+
+import pandas as pd
+
+from core import metrics
+
+CATEGORY = "category"
+PRICE = "float32"
+RETURN = "float64"
+DATETIME = "datetime64[ns]"
+
+SCHEMAS = {
+    "total_return": {
+        "종목코드": CATEGORY, "종목명": CATEGORY,
+        "시작가격": PRICE, "현재가격": PRICE, "수익률": RETURN,
+    },
+    "bt_points": {"종목코드": CATEGORY, "b가격": PRICE},
+    "prices": {"날짜": DATETIME, "종가": PRICE, "시가": PRICE, "고가": PRICE, "저가": PRICE},
+    "b_return": {
+        "종목명": CATEGORY, "종목코드": CATEGORY, "수익률": RETURN, "발생일": CATEGORY, "구분": CATEGORY,
+    },
+    "b_zone_monthly_tracking": {
+        "종목명": CATEGORY, "종목코드": CATEGORY, "b가격": PRICE,
+        "측정일": CATEGORY, "측정일종가": PRICE, "현재가": PRICE,
+        "측정일대비수익률": RETURN, "최고수익률": RETURN, "최저수익률": RETURN,
+        "월구분": CATEGORY, "월포맷": CATEGORY,
+    },
+    "b_zone_candidates": {
+        "종목명": CATEGORY, "종목코드": CATEGORY, "b가격": PRICE, "현재가격": PRICE, "변동률": RETURN,
+    },
+}
+SCHEMAS["b_return_shoot"] = SCHEMAS["b_return"]
+
+_report_lock = threading.Lock()
+_report = {}  # (로더, 인자) → (행 수, 변환 전 바이트, 변환 후 바이트)
+
+
+def _convert(series, dtype):
+    if dtype == CATEGORY:
+        return series if isinstance(series.dtype, pd.CategoricalDtype) else series.astype(str).astype(CATEGORY)
+    if dtype == DATETIME:
+        return pd.to_datetime(series, errors="coerce")
+    return pd.to_numeric(series, errors="coerce").astype(dtype)
+
+
+def normalize(df, table):
+    """등록된 컬럼만 바꾼다 (없는 컬럼은 무시, 이미 같은 타입이면 그대로)"""
+    if df is None or df.empty:
+        return df
+    schema = SCHEMAS[table]
+    changes = {
+        col: _convert(df[col], dtype)
+        for col, dtype in schema.items()
+        if col in df.columns and str(df[col].dtype) != dtype
+    }
+    return df.assign(**changes) if changes else df
+
+
+def nbytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def typed(table):
+    """
+    로더 결과를 normalize 하고 캐시 항목별 메모리 크기를 기록하는 데코레이터
+    (@st.cache_data 바로 아래 → 캐시에 들어가는 값이 이미 작은 타입).
+    """
+    def decorator(fn):
+        name = f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            # 이 아래가 실행된다 = st.cache_data 미스
+            metrics.record_cache(name, "load")
+            df = fn(*args, **kwargs)
+            if not isinstance(df, pd.DataFrame) or df.empty:
+                return df
+            before = nbytes(df)
+            df = normalize(df, table)
+            with _report_lock:
+                _report[(name, args, tuple(sorted(kwargs.items())))] = (len(df), before, nbytes(df))
+            return df
+
+        return wrapper
+
+    return decorator
+
+
+def memory_report():
+    """캐시 항목별 (로더, 인자, 행 수, 변환 전/후 MB, 배율) — 큰 항목 먼저"""
+    with _report_lock:
+        items = list(_report.items())
+    rows = [
+        {
+            "로더": name.rsplit(".", 1)[-1],
+            "인자": ", ".join([repr(a) for a in args] + [f"{k}={v!r}" for k, v in kwargs]),
+            "행 수": n,
+            "변환 전 MB": before / 1e6,
+            "변환 후 MB": after / 1e6,
+            "배율": before / after if after else 0.0,
+        }
+        for (name, args, kwargs), (n, before, after) in items
+    ]
+    df = pd.DataFrame(rows, columns=["로더", "인자", "행 수", "변환 전 MB", "변환 후 MB", "배율"])
+    return df.sort_values("변환 후 MB", ascending=False).reset_index(drop=True)
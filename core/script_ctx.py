@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""
+Streamlit 스크립트 실행 컨텍스트(ScriptRunContext) 도우미.
+
+작업 스레드(page_data / prefetch 등)에서도 호출한 세션의 컨텍스트를 보이게 해서
+st.cache_data 가 경고 없이 동작하고, 계측(core.metrics)이 세션을 구분할 수 있게 한다.
+"""
+import threading
+from contextlib import contextmanager
+
+try:
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+except ImportError:  # 다른 버전의 streamlit
+    add_script_run_ctx = get_script_run_ctx = None
+
+
+def current():
+    """현재 스레드의 컨텍스트 (스크립트 밖이면 None)"""
+    return get_script_run_ctx(suppress_warning=True) if get_script_run_ctx is not None else None
+
+
+def session_id():
+    ctx = current()
+    return ctx.session_id if ctx is not None else None
+
+
+@contextmanager
+def attached(ctx):
+    """with 블록 동안 현재(작업) 스레드에 ctx 를 붙이고, 끝나면 뗀다"""
+    thread = threading.current_thread()
+    if ctx is not None:
+        add_script_run_ctx(thread, ctx)
+    try:
+        yield
+    finally:
+        if ctx is not None:
+            add_script_run_ctx(thread, None)
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+동시 요청 합치기 (single-flight).
+
+인기 종목의 캐시가 만료되는 순간 여러 세션이 같은 로더를 같은 인자로 동시에 부르면,
+첫 호출만 실제로 조회하고 나머지는 그 결과를 기다렸다가 같이 받는다.
+로더 이름별로 호출 수 / 실제 조회 수 / 합쳐진 호출 수를 센다 (stats()).
+"""
+import functools
+import threading
+from collections import defaultdict
+
+_lock = threading.Lock()
+_inflight = {}  # key → _Call
+_counters = defaultdict(lambda: {"calls": 0, "fetches": 0, "coalesced": 0})
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+def do(name, key, fn, *args, **kwargs):
+    """
+    key 가 같은 호출이 진행 중이면 그 결과를 기다려 돌려주고, 없으면 fn 을 직접 실행한다.
+    name 은 통계용 이름 (보통 로더 이름). 예외도 기다리던 호출 모두에게 그대로 전달된다.
+    """
+    with _lock:
+        counter = _counters[name]
+        counter["calls"] += 1
+        call = _inflight.get(key)
+        leader = call is None
+        if leader:
+            call = _inflight[key] = _Call()
+            counter["fetches"] += 1
+        else:
+            counter["coalesced"] += 1
+
+    if not leader:
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.value
+
+    try:
+        call.value = fn(*args, **kwargs)
+        return call.value
+    except BaseException as e:
+        call.error = e
+        raise
+    finally:
+        with _lock:
+            _inflight.pop(key, None)
+        call.done.set()
+
+
+def coalesce(fn):
+    """do() 를 로더 + 인자 키로 적용하는 데코레이터"""
+    name = f"{fn.__module__}.{fn.__qualname__}"
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        return do(name, (name, args, tuple(sorted(kwargs.items()))), fn, *args, **kwargs)
+
+    return wrapper
+
+
+def stats():
+    """{로더 이름: {"calls", "fetches", "coalesced"}}"""
+    with _lock:
+        return {name: dict(c) for name, c in _counters.items()}
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+세션들이 복사 없이 함께 보는 읽기 전용 스냅샷.
+
+st.cache_data 는 호출할 때마다 저장된 값을 unpickle 해서 새 복사본을 돌려준다.
+동시에 50 세션이 같은 페이지를 열면 같은 total_return 이 메모리에 50 벌 생긴다.
+여기서는 로더 결과를 st.cache_resource 로 프로세스에 한 벌만 두고,
+페이지에는 데이터 버퍼를 공유하는 얕은 복사본(view)을 준다.
+
+Copy-on-Write 가 켜져 있으므로 페이지가 받은 DataFrame 에 열을 추가/변경해도
+그 페이지의 복사본만 바뀌고 공유 스냅샷은 그대로다. (pandas 3 은 기본값, 2.x 는 여기서 켠다)
+"""
+import pandas as pd
+import streamlit as st
+
+from core import db
+
+try:
+    if int(pd.__version__.split(".")[0]) < 3:
+        pd.set_option("mode.copy_on_write", True)
+except Exception:
+    pass
+
+# 종목별 가격처럼 인자가 많은 로더도 있으므로 항목 수를 제한한다
+MAX_ENTRIES = 512
+
+
+@st.cache_resource(ttl=db.CACHE_TTL, max_entries=MAX_ENTRIES, show_spinner=False)
+def _snapshot(name, args, kwargs, _loader):
+    # st.cache_data 층을 건너뛰고 그 아래(타입 변환 → 디스크 캐시 → 조회)를 직접 부른다
+    # → 프로세스 안에는 이 한 벌만 남는다
+    fn = getattr(_loader, "__wrapped__", _loader)
+    return fn(*args, **dict(kwargs))
+
+
+def get(loader, *args, **kwargs):
+    """
+    loader(*args, **kwargs) 결과의 공유 스냅샷 (얕은 복사본).
+    loader 는 core.db 의 load_* 처럼 인자가 해시 가능한 로더.
+    """
+    name = f"{loader.__module__}.{loader.__qualname__}"
+    value = _snapshot(name, args, tuple(sorted(kwargs.items())), loader)
+    return value.copy(deep=False) if isinstance(value, pd.DataFrame) else value
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""
+Supabase 대체용 로컬 SQLite 백엔드.
+
+supabase-py 의 쿼리 빌더 중 이 앱에서 쓰는 부분만 흉내 낸다.
+(table().select().eq().order().range().limit().execute())
+테스트/벤치마크에서 core.db.set_backend(SqliteBackend()) 로 끼워 넣어 사용한다.
+"""
+import random
+import sqlite3
+import threading
+from datetime import date, timedelta
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _parse_columns(columns):
+    cols = []
+    for part in columns or ("*",):
+        cols.extend(c.strip() for c in str(part).split(",") if c.strip())
+    return cols or ["*"]
+
+
+class StandinResponse:
+    """postgrest APIResponse 와 같은 모양 (data, count)"""
+
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class StandinQuery:
+    """postgrest 요청 빌더의 최소 구현"""
+
+    def __init__(self, backend, table):
+        self._backend = backend
+        self._table = table
+        self._columns = ["*"]
+        self._count = None
+        self._head = False
+        self._where = []
+        self._params = []
+        self._order = []
+        self._limit = None
+        self._offset = None
+
+    # ------------------------------------------------
+    # select / 필터
+    # ------------------------------------------------
+    def select(self, *columns, count=None, head=None):
+        self._columns = _parse_columns(columns)
+        self._count = count
+        self._head = bool(head)
+        return self
+
+    def _filter(self, column, op, value):
+        self._where.append(f"{_quote(column)} {op} ?")
+        self._params.append(value)
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, "=", value)
+
+    def neq(self, column, value):
+        return self._filter(column, "!=", value)
+
+    def gt(self, column, value):
+        return self._filter(column, ">", value)
+
+    def gte(self, column, value):
+        return self._filter(column, ">=", value)
+
+    def lt(self, column, value):
+        return self._filter(column, "<", value)
+
+    def lte(self, column, value):
+        return self._filter(column, "<=", value)
+
+    def ilike(self, column, pattern):
+        # SQLite LIKE 는 ASCII 대소문자를 구분하지 않는다
+        return self._filter(column, "LIKE", pattern)
+
+    def in_(self, column, values):
+        values = list(values)
+        if not values:
+            self._where.append("0")
+            return self
+        self._where.append(f"{_quote(column)} IN ({', '.join('?' * len(values))})")
+        self._params.extend(values)
+        return self
+
+    # ------------------------------------------------
+    # 정렬 / 페이지
+    # ------------------------------------------------
+    def order(self, column, desc=False, nullsfirst=None):
+        clause = f"{_quote(column)} {'DESC' if desc else 'ASC'}"
+        if nullsfirst is not None:
+            clause += " NULLS FIRST" if nullsfirst else " NULLS LAST"
+        self._order.append(clause)
+        return self
+
+    def limit(self, size):
+        self._limit = int(size)
+        return self
+
+    def range(self, start, end):
+        self._offset = int(start)
+        self._limit = int(end) - int(start) + 1
+        return self
+
+    # ------------------------------------------------
+    # 실행
+    # ------------------------------------------------
+    def _sql(self):
+        cols = "*" if self._columns == ["*"] else ", ".join(_quote(c) for c in self._columns)
+        sql = f"SELECT {cols} FROM {_quote(self._table)}"
+        if self._where:
+            sql += " WHERE " + " AND ".join(self._where)
+        if self._order:
+            sql += " ORDER BY " + ", ".join(self._order)
+        if self._limit is not None or self._offset is not None:
+            sql += f" LIMIT {self._limit if self._limit is not None else -1}"
+            if self._offset:
+                sql += f" OFFSET {self._offset}"
+        return sql
+
+    def execute(self):
+        count = None
+        if self._count:
+            count_sql = f"SELECT COUNT(*) FROM {_quote(self._table)}"
+            if self._where:
+                count_sql += " WHERE " + " AND ".join(self._where)
+            count = self._backend.query(count_sql, self._params)[0][0]
+        if self._head:
+            return StandinResponse([], count)
+        rows = self._backend.query(self._sql(), self._params, as_dict=True)
+        return StandinResponse(rows, count)
+
+
+class SqliteBackend:
+    """
+    Supabase 클라이언트 자리에 끼워 넣는 SQLite 백엔드.
+    path=":memory:" 이면 프로세스 메모리에만 존재한다.
+    """
+
+    def __init__(self, path=":memory:"):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+
+    def table(self, name):
+        return StandinQuery(self, name)
+
+    def query(self, sql, params=(), as_dict=False):
+        with self._lock:
+            cur = self._conn.execute(sql, list(params))
+            rows = cur.fetchall()
+            if not as_dict:
+                return rows
+            names = [d[0] for d in cur.description]
+        return [dict(zip(names, row)) for row in rows]
+
+    def insert_rows(self, table, rows):
+        """dict 리스트를 테이블에 추가 (테이블이 없으면 첫 행 기준으로 생성)"""
+        rows = list(rows)
+        if not rows:
+            return
+        cols = list(rows[0].keys())
+        col_sql = ", ".join(_quote(c) for c in cols)
+        with self._lock:
+            self._conn.execute(f"CREATE TABLE IF NOT EXISTS {_quote(table)} ({col_sql})")
+            self._conn.executemany(
+                f"INSERT INTO {_quote(table)} ({col_sql}) VALUES ({', '.join('?' * len(cols))})",
+                [[r.get(c) for c in cols] for r in rows],
+            )
+            self._bump_version(table)
+            self._conn.commit()
+
+    def _bump_version(self, table):
+        """sql/data_versions.sql 의 트리거 흉내: 쓰기가 있을 때마다 data_versions.version += 1"""
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS data_versions "
+            "(table_name TEXT PRIMARY KEY, version INTEGER NOT NULL, updated_at TEXT)"
+        )
+        self._conn.execute(
+            "INSERT INTO data_versions (table_name, version, updated_at) VALUES (?, 1, datetime('now')) "
+            "ON CONFLICT (table_name) DO UPDATE SET version = version + 1, updated_at = excluded.updated_at",
+            [table],
+        )
+
+    def create_index(self, table, *columns):
+        name = f"idx_{table}_{'_'.join(columns)}"
+        with self._lock:
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {_quote(name)} ON {_quote(table)} "
+                f"({', '.join(_quote(c) for c in columns)})"
+            )
+            self._conn.commit()
+
+
+# ------------------------------------------------
+# 데모 데이터 생성 (벤치마크 / 로컬 실행용)
+# ------------------------------------------------
+def seed_demo(backend, n_stocks=50, n_days=750, b_per_stock=8, n_months=12, seed=0):
+    """실제 테이블 구조와 같은 모양의 가짜 데이터를 채운다."""
+    rng = random.Random(seed)
+    start = date(2015, 1, 2)
+    days = []
+    d = start
+    while len(days) < n_days:
+        if d.weekday() < 5:
+            days.append(d.isoformat())
+        d += timedelta(days=1)
+
+    month_bounds = {}
+    for i, day in enumerate(days):
+        lo_i, _ = month_bounds.get(day[:7], (i, i))
+        month_bounds[day[:7]] = (lo_i, i)
+    months = sorted(month_bounds)
+
+    prices, bt, total, b_ret, b_shoot, monthly = [], [], [], [], [], []
+    for i in range(n_stocks):
+        code = f"{i:06d}"
+        name = f"종목{i:03d}"
+        price = rng.uniform(5_000, 100_000)
+        closes = []
+        for day in days:
+            price = max(100.0, price * (1 + rng.gauss(0, 0.02)))
+            closes.append(round(price))
+            prices.append({"종목코드": code, "날짜": day, "종가": closes[-1]})
+
+        lo, hi = min(closes), max(closes)
+        for _ in range(b_per_stock):
+            bt.append({"종목코드": code, "b가격": round(rng.uniform(lo, hi))})
+
+        first, last = closes[0], closes[-1]
+        total.append({
+            "종목코드": code, "종목명": name, "시작가격": first, "현재가격": last,
+            "수익률": round((last - first) / first * 100, 2),
+        })
+        for rows, kind in ((b_ret, "눌림"), (b_shoot, "돌파")):
+            rows.append({
+                "종목명": name, "종목코드": code, "수익률": round(rng.gauss(0, 10), 2),
+                "발생일": days[rng.randrange(len(days))], "구분": kind,
+            })
+        # 최근 n_months 개월: 그 달 첫 거래일에 측정, 마지막 거래일 종가까지의 성과
+        for month in months[-n_months:]:
+            lo_i, hi_i = month_bounds[month]
+            base, window = closes[lo_i], closes[lo_i:hi_i + 1]
+            monthly.append({
+                "종목명": name, "종목코드": code, "b가격": bt[-1]["b가격"],
+                "측정일": days[lo_i], "측정일종가": base, "현재가": window[-1],
+                "측정일대비수익률": round((window[-1] - base) / base * 100, 2),
+                "최고수익률": round((max(window) - base) / base * 100, 2),
+                "최저수익률": round((min(window) - base) / base * 100, 2),
+                "월구분": month + "-01",
+            })
+
+    backend.insert_rows("prices", prices)
+    backend.insert_rows("bt_points", bt)
+    backend.insert_rows("total_return", total)
+    backend.insert_rows("b_return", b_ret)
+    backend.insert_rows("b_return_shoot", b_shoot)
+    backend.insert_rows("b_zone_monthly_tracking", monthly)
+    backend.create_index("prices", "종목코드", "날짜")
+    backend.create_index("bt_points", "종목코드")
+    return backend
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+테이블별 데이터 버전 조회 (변경 감지 기반 캐시 무효화).
+
+data_versions 테이블(sql/data_versions.sql)은 각 테이블에 쓰기가 있을 때마다
+트리거가 version 을 1씩 올린다. 행 몇 개짜리 테이블 하나만 주기적으로 읽어서
+버전이 바뀐 테이블의 로더만 다시 조회하게 한다.
+
+data_versions 가 없는 백엔드에서는 버전을 알 수 없으므로(빈 문자열) 기존처럼 TTL 로만 만료된다.
+"""
+import logging
+import os
+import threading
+import time
+
+from core import db
+
+logger = logging.getLogger(__name__)
+
+VERSION_TABLE = "data_versions"
+# 버전 테이블을 다시 읽는 간격 (초) — 새 데이터가 반영되기까지의 최대 지연
+PROBE_SECONDS = float(os.environ.get("DATA_VERSION_PROBE_SECONDS", "30"))
+# 버전 테이블이 없을 때 다시 확인하는 간격
+RETRY_SECONDS = 600
+# 버전을 아는 로더의 디스크 캐시 TTL (버전이 바뀌면 그 전에라도 새로 받는다)
+VERSIONED_TTL = float(os.environ.get("DATA_VERSION_TTL", str(6 * 3600)))
+
+_lock = threading.Lock()
+_state = {"checked": None, "versions": None}
+
+
+def _probe():
+    rows = db.get_client().table(VERSION_TABLE).select("table_name, version").execute().data
+    return {row["table_name"]: str(row["version"]) for row in rows or []}
+
+
+def current():
+    """{테이블: 버전} (버전 테이블을 쓸 수 없으면 None). PROBE_SECONDS 동안은 이전 결과를 쓴다."""
+    with _lock:
+        checked, versions = _state["checked"], _state["versions"]
+        interval = PROBE_SECONDS if versions is not None else RETRY_SECONDS
+        if checked is not None and time.monotonic() - checked < interval:
+            return versions
+        try:
+            versions = _probe()
+        except Exception as e:
+            if checked is None:
+                logger.info("%s 조회 불가, TTL 만료만 사용: %s", VERSION_TABLE, e)
+            versions = None
+        _state["checked"], _state["versions"] = time.monotonic(), versions
+        return versions
+
+
+def token(tables):
+    """
+    캐시 키에 붙일 버전 문자열 (예: "bt_points=3,total_return=12").
+    하나라도 모르면 빈 문자열.
+    """
+    versions = current()
+    if not versions or not tables:
+        return ""
+    if any(t not in versions for t in tables):
+        return ""
+    return ",".join(f"{t}={versions[t]}" for t in sorted(tables))
+
+
+def reset():
+    """다음 호출 때 바로 다시 조회하도록 (set_backend 이후 등)"""
+    with _lock:
+        _state["checked"], _state["versions"] = None, None
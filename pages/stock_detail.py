@@ -1,22 +1,18 @@
 # -*- coding: utf-8 -*-
 import streamlit as st
 import pandas as pd
-import os
-from supabase import create_client
-import altair as alt
+import numpy as np
+from core import db, metrics, page_data, prefetch, snapshots
+from core.b_index import nearest_k, price_range, stock_b_prices
+from core.chart_data import CHART_MAX_POINTS, downsample, pick_resolution
 from datetime import timedelta
 
 # ------------------------------------------------
 # Supabase 연결
 # ------------------------------------------------
-SUPABASE_URL = os.environ.get("SUPABASE_URL") or st.secrets.get("SUPABASE_URL")
-SUPABASE_KEY = os.environ.get("SUPABASE_KEY") or st.secrets.get("SUPABASE_KEY")
-
-if not SUPABASE_URL or not SUPABASE_KEY:
-    st.error("❌ Supabase 환경변수가 설정되지 않았습니다.")
-    st.stop()
-
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+# ✅ 실행 시간 계측 (?perf=1 이면 페이지 맨 아래에 성능 패널)
+metrics.page_start("stock_detail")
+db.require_client()
 
 # ------------------------------------------------
 # 페이지 설정
@@ -32,6 +28,8 @@ if "selected_stock_code" not in st.session_state or "selected_stock_name" not in
 
 stock_name = st.session_state["selected_stock_name"]
 stock_code = st.session_state["selected_stock_code"]
+# ✅ 방문 기록 (같은 종목에서 기간 / b가격 위젯으로 다시 실행될 때는 한 번만 센다)
+prefetch.visit(stock_code)
 
 st.markdown(f"<h4 style='text-align:center;'>📈 {stock_name} ({stock_code}) 주가 차트</h4>", unsafe_allow_html=True)
 st.markdown("<p style='text-align:center; color:gray; font-size:13px;'>b가격 표시 모드 / 기간 선택 / 댓글 시스템</p>", unsafe_allow_html=True)
@@ -40,53 +38,25 @@ st.markdown("---")
 # ------------------------------------------------
 # 데이터 로드
 # ------------------------------------------------
-@st.cache_data(ttl=300)
-def load_price_data(code):
+def load_price_data(code, resolution="D"):
     try:
-        all_data, start, step = [], 0, 1000
-        while True:
-            res = (
-                supabase.table("prices")
-                .select("날짜, 종가")
-                .eq("종목코드", code)
-                .order("날짜", desc=False)
-                .range(start, start + step - 1)
-                .execute()
-            )
-            chunk = res.data
-            if not chunk:
-                break
-            all_data.extend(chunk)
-            if len(chunk) < step:
-                break
-            start += step
-
-        df = pd.DataFrame(all_data)
-        if not df.empty:
-            df["날짜"] = pd.to_datetime(df["날짜"])
-            df = df.sort_values("날짜")
-        return df
+        return snapshots.get(db.load_prices, code, resolution)
     except Exception as e:
         st.error(f"❌ 가격 데이터 로딩 오류: {e}")
         return pd.DataFrame()
 
 
-@st.cache_data(ttl=300)
-def load_b_prices(code):
-    try:
-        res = supabase.table("bt_points").select("b가격").eq("종목코드", code).execute()
-        df = pd.DataFrame(res.data)
-        if not df.empty:
-            df["b가격"] = df["b가격"].astype(float)
-            df = df.sort_values("b가격")
-        return df
-    except Exception as e:
-        st.error(f"❌ b가격 데이터 로딩 오류: {e}")
-        return pd.DataFrame()
-
-
-df_price = load_price_data(stock_code)
-df_b = load_b_prices(stock_code)
+# ✅ 가격 이력과 b가격을 동시에 받는다 (가격은 세션들이 함께 보는 공유 스냅샷)
+data, errors = page_data.fetch({
+    "price": (snapshots.get, db.load_prices, stock_code, "D"),
+    "b_prices": (stock_b_prices, stock_code),
+})
+if "price" in errors:
+    st.error(f"❌ 가격 데이터 로딩 오류: {errors['price']}")
+if "b_prices" in errors:
+    st.error(f"❌ b가격 데이터 로딩 오류: {errors['b_prices']}")
+df_price = data.get("price", pd.DataFrame())
+b_prices = data.get("b_prices", np.empty(0))
 
 # ------------------------------------------------
 # 기간 선택
@@ -94,12 +64,23 @@ df_b = load_b_prices(stock_code)
 st.subheader("⏳ 차트 기간 선택")
 period = st.radio("보기 기간 선택", ("1년", "2년", "3년", "전체"), horizontal=True)
 
+resolution = "D"
 if not df_price.empty:
     latest_date = df_price["날짜"].max()
+    start_date = df_price["날짜"].min()
     if period != "전체":
         years = int(period.replace("년", ""))
         start_date = latest_date - timedelta(days=365 * years)
-        df_price = df_price[df_price["날짜"] >= start_date]
+
+    # ✅ 긴 기간은 주봉/월봉으로 (일봉 해상도는 화면에서 구분되지 않음)
+    resolution = pick_resolution(start_date, latest_date)
+    if resolution != "D":
+        df_resampled = load_price_data(stock_code, resolution)
+        if not df_resampled.empty:
+            df_price = df_resampled
+        else:
+            resolution = "D"
+    df_price = df_price[df_price["날짜"] >= start_date]
 
 # ------------------------------------------------
 # b가격 표시 옵션
@@ -121,11 +102,32 @@ with col2:
 if df_price.empty:
     st.warning("⚠️ 가격 데이터 없음")
 else:
+    # ✅ altair 는 차트를 그릴 때만 import (가격 데이터가 없으면 불러오지 않음)
+    import altair as alt
+
     current_price = df_price["종가"].iloc[-1]
     y_min, y_max = df_price["종가"].min(), df_price["종가"].max()
 
+    visible_b = pd.DataFrame(columns=["b가격"])
+    if show_b and len(b_prices) > 0:
+        # ✅ 현재 표시된 구간(y_min~y_max) 내의 b가격만 (정렬된 배열 → searchsorted 슬라이스)
+        visible_b_all = price_range(b_prices, y_min, y_max)
+
+        if mode == "가까운 1개":
+            visible = nearest_k(visible_b_all, current_price, 1)
+        elif mode == "가까운 3개":
+            # ✅ 현재가 주변(가격 순서상 이웃) 3개
+            visible = nearest_k(visible_b_all, current_price, 3)
+        else:  # 전체
+            visible = visible_b_all
+
+        visible_b = pd.DataFrame({"b가격": visible})
+
+    # ✅ 기간이 길어도 브라우저로 보내는 점 개수는 일정하게 (최고/최저점, b가격 교차점 유지)
+    df_chart = downsample(df_price, max_points=CHART_MAX_POINTS, keep_levels=visible_b["b가격"].to_numpy())
+
     base_chart = (
-        alt.Chart(df_price)
+        alt.Chart(df_chart)
         .mark_line(color="#f9a825")
         .encode(
             x=alt.X("날짜:T", title="날짜"),
@@ -134,56 +136,33 @@ else:
         )
     )
 
-    if show_b and not df_b.empty:
-        # ✅ 현재 표시된 구간(y_min~y_max) 내의 b가격만 필터링
-        visible_b_all = df_b[(df_b["b가격"] >= y_min) & (df_b["b가격"] <= y_max)].copy()
-
-        if not visible_b_all.empty:
-            # 현재가 기준으로 가까운 순 정렬
-            visible_b_all["diff"] = (visible_b_all["b가격"] - current_price).abs()
-            visible_b_all = visible_b_all.sort_values("diff").reset_index(drop=True)
-
-            if mode == "가까운 1개":
-                visible_b = visible_b_all.head(1)
-
-            elif mode == "가까운 3개":
-                # ✅ 현재 기간 내에서 가까운 3개
-                nearest_idx = visible_b_all["diff"].idxmin()
-                start_idx = max(0, nearest_idx - 1)
-                end_idx = min(len(visible_b_all), nearest_idx + 3)
-                visible_b = visible_b_all.iloc[start_idx:end_idx]
-
-            else:  # 전체
-                visible_b = visible_b_all.copy()
-        else:
-            visible_b = pd.DataFrame()
-
-        # ------------------------------------------------
-        # 시각화
-        # ------------------------------------------------
-        if not visible_b.empty:
-            rules = alt.Chart(visible_b).mark_rule(color="gray").encode(y="b가격:Q")
-
-            texts = (
-                alt.Chart(visible_b)
-                .mark_text(
-                    align="left",
-                    baseline="middle",
-                    dx=-250,
-                    color="gray",
-                    fontSize=11,
-                    fontWeight="bold"
-                )
-                .encode(
-                    y="b가격:Q",
-                    text=alt.Text("b가격:Q", format=".0f")
-                )
+    # ------------------------------------------------
+    # 시각화
+    # ------------------------------------------------
+    if not visible_b.empty:
+        rules = alt.Chart(visible_b).mark_rule(color="gray").encode(y="b가격:Q")
+
+        texts = (
+            alt.Chart(visible_b)
+            .mark_text(
+                align="left",
+                baseline="middle",
+                dx=-250,
+                color="gray",
+                fontSize=11,
+                fontWeight="bold"
+            )
+            .encode(
+                y="b가격:Q",
+                text=alt.Text("b가격:Q", format=".0f")
             )
+        )
 
-            chart = (base_chart + rules + texts).properties(width="container", height=400)
-        else:
-            chart = base_chart.properties(width="container", height=400)
+        chart = (base_chart + rules + texts).properties(width="container", height=400)
     else:
         chart = base_chart.properties(width="container", height=400)
 
     st.altair_chart(chart, use_container_width=True)
+    st.caption(f"📐 표시 단위: {({'D': '일봉', 'W': '주봉', 'M': '월봉'})[resolution]}")
+
+metrics.page_end()
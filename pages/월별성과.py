@@ -1,9 +1,7 @@
 # -*- coding: utf-8 -*-
 import streamlit as st
 import pandas as pd
-import os
-from supabase import create_client
-from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode
+from core import db, metrics, monthly_summary, prefetch, snapshots
 # (예: pages/한국 돌파 종목.py 파일)
 
 # ----------------------------------------------
@@ -32,14 +30,9 @@ st.markdown("### 🔵 국내 추격 (돌파) 종목 리스트")
 # ------------------------------------------------
 # Supabase 연결
 # ------------------------------------------------
-SUPABASE_URL = os.environ.get("SUPABASE_URL") or st.secrets.get("SUPABASE_URL")
-SUPABASE_KEY = os.environ.get("SUPABASE_KEY") or st.secrets.get("SUPABASE_KEY")
-
-if not SUPABASE_URL or not SUPABASE_KEY:
-    st.error("❌ Supabase 환경변수가 설정되지 않았습니다.")
-    st.stop()
-
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+# ✅ 실행 시간 계측 (?perf=1 이면 페이지 맨 아래에 성능 패널)
+metrics.page_start("월별성과")
+db.require_client()
 
 # ------------------------------------------------
 # 페이지 설정
@@ -53,87 +46,134 @@ st.markdown("---")
 # ------------------------------------------------
 # 데이터 로드
 # ------------------------------------------------
-@st.cache_data(ttl=300)
+DISPLAY_COLS = [
+    "종목명", "종목코드", "b가격", "측정일", "측정일종가",
+    "현재가", "측정일대비수익률", "최고수익률", "최저수익률"
+]
+
+
 def load_monthly_tracking():
     try:
-        res = (
-            supabase.table("b_zone_monthly_tracking")
-            .select("종목명, 종목코드, b가격, 측정일, 측정일종가, 현재가, 측정일대비수익률, 최고수익률, 최저수익률, 월구분")
-            .order("월구분", desc=True)
-            .execute()
-        )
-        df = pd.DataFrame(res.data)
-        if df.empty:
-            return df
-
-        df["월포맷"] = pd.to_datetime(df["월구분"], errors="coerce").dt.strftime("%y.%m")
-        df = df[df["월포맷"].notna()]
-        df = df.fillna(0)
-        return df
+        return snapshots.get(db.load_monthly_tracking)
     except Exception as e:
         st.error(f"❌ Supabase 데이터 로드 오류: {e}")
         return pd.DataFrame()
 
-df = load_monthly_tracking()
-if df.empty:
+
+@st.cache_resource(ttl=300, show_spinner=False)
+def load_months():
+    """
+    월포맷 → 해당 월 표시용 DataFrame (groupby 한 번으로 미리 나눠 둠, 최신 월부터)
+    모든 세션이 같은 dict 를 공유한다 (읽기 전용으로만 사용)
+    """
+    df = load_monthly_tracking()
+    if df.empty:
+        return {}
+    groups = {
+        month: g.sort_values("측정일대비수익률", ascending=False)[DISPLAY_COLS].reset_index(drop=True)
+        for month, g in df.groupby("월포맷", sort=False)
+    }
+    return dict(sorted(groups.items(), reverse=True))
+
+def load_summary():
+    """(월별 요약, 전체 요약) — 요약 엔진이 바뀐 달만 다시 계산한다"""
+    df = load_monthly_tracking()
+    if df.empty:
+        return pd.DataFrame(), {}
+    by_month, overall = monthly_summary.get_engine().update(df)
+    by_month = by_month.assign(월포맷=pd.to_datetime(by_month.index).strftime("%y.%m"))
+    return by_month, overall
+
+month_frames = load_months()
+if not month_frames:
     st.warning("⚠️ b_zone_monthly_tracking 테이블에 데이터가 없습니다.")
     st.stop()
 
 # ------------------------------------------------
-# 월별 탭 생성
+# 요약 (전체 기간)
 # ------------------------------------------------
-months = sorted(df["월포맷"].unique(), reverse=True)
-tabs = st.tabs(months)
-
-for i, month in enumerate(months):
-    with tabs[i]:
-        st.subheader(f"📅 {month}월 성과")
-
-        df_month = df[df["월포맷"] == month].copy()
-        df_month = df_month.sort_values("측정일대비수익률", ascending=False)
-
-        display_cols = [
-            "종목명", "종목코드", "b가격", "측정일", "측정일종가",
-            "현재가", "측정일대비수익률", "최고수익률", "최저수익률"
-        ]
-
-        gb = GridOptionsBuilder.from_dataframe(df_month[display_cols])
-        gb.configure_default_column(resizable=True, sortable=True, filter=True)
-        gb.configure_selection(selection_mode="single", use_checkbox=False)
-        gb.configure_grid_options(domLayout='normal')
-        grid_options = gb.build()
-
-        grid_response = AgGrid(
-            df_month[display_cols],
-            gridOptions=grid_options,
-            enable_enterprise_modules=False,
-            update_mode=GridUpdateMode.SELECTION_CHANGED,
-            theme="streamlit",
-            fit_columns_on_grid_load=True,
-            height=550,
+summary_by_month, summary = load_summary()
+if summary:
+    cols = st.columns(5)
+    cols[0].metric("적중률", f"{summary['적중률']:.1f}%")
+    cols[1].metric("평균 수익률", f"{summary['평균수익률']:.2f}%")
+    cols[2].metric("중앙 수익률", f"{summary['중앙수익률']:.2f}%")
+    cols[3].metric("누적 수익률", f"{summary['누적수익률']:.1f}%")
+    cols[4].metric("집계", f"{summary['개월수']}개월 / {summary['종목수']}건")
+
+    with st.expander("📊 월별 요약 / 누적 수익 곡선"):
+        st.line_chart(summary_by_month.set_index("월포맷")["누적수익률"], height=200)
+        st.dataframe(
+            summary_by_month.set_index("월포맷")[
+                ["종목수", "적중률", "평균수익률", "중앙수익률", "최고수익률_p50", "최저수익률_p50", "누적수익률"]
+            ].sort_index(ascending=False).round(2),
+            use_container_width=True,
         )
 
-        selected = grid_response.get("selected_rows")
+# ------------------------------------------------
+# 월 선택 (선택한 달의 표만 그린다)
+# ------------------------------------------------
+months = list(month_frames)
+month = st.selectbox("📅 월 선택", months, index=0)
 
-        # ✅ 타입별 안전 처리
-        if selected is not None:
-            if isinstance(selected, pd.DataFrame):
-                selected = selected.to_dict("records")
+st.subheader(f"📅 {month}월 성과")
+df_month = month_frames[month]
 
-            if isinstance(selected, list) and len(selected) > 0:
-                selected_row = selected[0]
-                stock_name = selected_row.get("종목명")
-                stock_code = selected_row.get("종목코드")
+month_row = summary_by_month[summary_by_month["월포맷"] == month] if summary else pd.DataFrame()
+if not month_row.empty:
+    m = month_row.iloc[0]
+    st.caption(
+        f"적중률 {m['적중률']:.1f}% · 평균 {m['평균수익률']:.2f}% · 중앙 {m['중앙수익률']:.2f}% · "
+        f"최고수익률 중앙 {m['최고수익률_p50']:.2f}% · 최저수익률 중앙 {m['최저수익률_p50']:.2f}%"
+    )
 
-                if not stock_code:
-                    st.warning("⚠️ 종목코드가 없습니다. 테이블 구조를 확인하세요.")
-                    st.stop()
+# ✅ st_aggrid 는 표를 그릴 때 import (데이터가 없어 st.stop 되면 불러오지 않음)
+from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode
 
-                # 세션 저장 후 바로 페이지 이동
-                st.session_state["selected_stock_name"] = stock_name
-                st.session_state["selected_stock_code"] = stock_code
-                st.switch_page("pages/stock_detail.py")
+gb = GridOptionsBuilder.from_dataframe(df_month)
+gb.configure_default_column(resizable=True, sortable=True, filter=True)
+gb.configure_selection(selection_mode="single", use_checkbox=False)
+gb.configure_grid_options(domLayout='normal')
+grid_options = gb.build()
+
+grid_response = AgGrid(
+    df_month,
+    gridOptions=grid_options,
+    enable_enterprise_modules=False,
+    update_mode=GridUpdateMode.SELECTION_CHANGED,
+    theme="streamlit",
+    fit_columns_on_grid_load=True,
+    height=550,
+    key=f"monthly_grid_{month}",
+)
+
+# ✅ (선택 기능) 화면 위쪽 종목의 차트 데이터를 미리 받아 둔다
+prefetch.warm_listing(df_month)
+
+selected = grid_response.get("selected_rows")
+
+# ✅ 타입별 안전 처리
+if selected is not None:
+    if isinstance(selected, pd.DataFrame):
+        selected = selected.to_dict("records")
+
+    if isinstance(selected, list) and len(selected) > 0:
+        selected_row = selected[0]
+        stock_name = selected_row.get("종목명")
+        stock_code = selected_row.get("종목코드")
+
+        if not stock_code:
+            st.warning("⚠️ 종목코드가 없습니다. 테이블 구조를 확인하세요.")
+            st.stop()
+
+        # 세션 저장 후 바로 페이지 이동
+        st.session_state["selected_stock_name"] = stock_name
+        st.session_state["selected_stock_code"] = stock_code
+        prefetch.open_detail(stock_code)
+        st.switch_page("pages/stock_detail.py")
 
 
 st.markdown("---")
 st.caption("💡 행을 클릭하면 해당 종목의 차트 페이지로 이동합니다.")
+
+metrics.page_end()
@@ -1,9 +1,7 @@
 # -*- coding: utf-8 -*-
 import streamlit as st
 import pandas as pd
-import os
-from supabase import create_client
-from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode
+from core import db, metrics, prefetch, row_model
 # (예: pages/한국 돌파 종목.py 파일)
 
 # ----------------------------------------------
@@ -26,15 +24,9 @@ show_app_header()
 # Supabase 연결
 # ------------------------------------------------
 
-# 환경 변수 또는 st.secrets에서 값 로드
-SUPABASE_URL = os.environ.get("SUPABASE_URL") or st.secrets["SUPABASE_URL"]
-SUPABASE_KEY = os.environ.get("SUPABASE_KEY") or st.secrets["SUPABASE_KEY"]
-
-if not SUPABASE_URL or not SUPABASE_KEY:
-    st.error("❌ Supabase 환경변수(SUPABASE_URL, SUPABASE_KEY)가 설정되지 않았습니다.")
-    st.stop()
-
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+# ✅ 실행 시간 계측 (?perf=1 이면 페이지 맨 아래에 성능 패널)
+metrics.page_start("전체 종목")
+db.require_client()
 
 # ------------------------------------------------
 # 페이지 설정
@@ -46,35 +38,53 @@ st.markdown("<p style='text-align:center; color:gray; font-size:13px;'> 해당 
 st.markdown("---")
 
 # ------------------------------------------------
-# 데이터 로딩 (종목코드를 포함하도록 수정)
+# 검색 / 정렬 / 페이지 (서버에서 처리하고 표에는 한 페이지만 보낸다)
+# ------------------------------------------------
+c1, c2, c3, c4 = st.columns([3, 2, 1, 1])
+query = c1.text_input("종목 검색", placeholder="종목명 또는 종목코드", key="all_stocks_query")
+sort_col = c2.selectbox("정렬", row_model.SORTABLE, key="all_stocks_sort")
+descending = c3.toggle("내림차순", value=True, key="all_stocks_desc")
+page_size = c4.selectbox("행 수", [50, 100, 200], key="all_stocks_page_size")
+
+# 검색어 / 정렬 / 행 수가 바뀌면 첫 페이지로
+view_key = (query, sort_col, descending, page_size)
+if st.session_state.get("all_stocks_view") != view_key:
+    st.session_state["all_stocks_view"] = view_key
+    st.session_state["all_stocks_page"] = 1
+
+# ------------------------------------------------
+# 데이터 로딩 (현재 페이지만)
 # ------------------------------------------------
-@st.cache_data(ttl=300)
-def load_total_return():
+def load_page(page):
     try:
-        # 종목코드가 '종목코드'라는 컬럼명이라고 가정하고 쿼리에 추가
-        # 실제 테이블의 종목코드 컬럼명에 맞게 수정해주세요. (예: 'ticker' 등)
-        res = (
-            supabase.table("total_return")
-            .select("종목코드", "종목명, 시작가격, 현재가격, 수익률")
-            .order("수익률", desc=True)
-            .execute()
-        )
-        return pd.DataFrame(res.data)
+        return row_model.load_window((page - 1) * page_size, page_size, sort_col, descending, query)
     except Exception as e:
         st.error(f"❌ 데이터 불러오기 오류: {e}")
-        return pd.DataFrame()
+        return pd.DataFrame(), 0, None
 
-df = load_total_return()
+page = st.session_state.get("all_stocks_page", 1)
+df, total, _ = load_page(page)
 
-if df.empty:
-    st.warning("⚠️ Supabase total_return 테이블에서 데이터를 불러올 수 없습니다.")
+if total == 0:
+    if query:
+        st.info(f"🔎 '{query}' 에 해당하는 종목이 없습니다.")
+    else:
+        st.warning("⚠️ Supabase total_return 테이블에서 데이터를 불러올 수 없습니다.")
     st.stop()
 
+n_pages = max(1, -(-total // page_size))
+if page > n_pages:
+    page = st.session_state["all_stocks_page"] = n_pages
+    df, total, _ = load_page(page)
+
 # ------------------------------------------------
-# AgGrid 표시 설정
+# AgGrid 표시 설정 (정렬 / 필터는 위 컨트롤이 서버에서 처리)
 # ------------------------------------------------
+# ✅ st_aggrid 는 표를 그릴 때 import (데이터가 없어 st.stop 되면 불러오지 않음)
+from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode
+
 gb = GridOptionsBuilder.from_dataframe(df)
-gb.configure_default_column(resizable=True, sortable=True, filter=True)
+gb.configure_default_column(resizable=True, sortable=False, filter=False)
 gb.configure_selection(selection_mode="single", use_checkbox=False)
 gb.configure_grid_options(domLayout='normal')
 grid_options = gb.build()
@@ -90,6 +100,14 @@ grid_response = AgGrid(
     height=600,
 )
 
+p1, p2 = st.columns([1, 3])
+p1.number_input("페이지", min_value=1, max_value=n_pages, step=1, key="all_stocks_page")
+start = (page - 1) * page_size
+p2.caption(f"전체 {total:,}개 중 {start + 1:,}–{start + len(df):,}번째 ({page}/{n_pages} 페이지)")
+
+# ✅ (선택 기능) 화면 위쪽 종목의 차트 데이터를 미리 받아 둔다
+prefetch.warm_listing(df)
+
 # ------------------------------------------------
 # 행 클릭 시 페이지 이동 (종목코드를 세션에 저장하도록 수정)
 # ------------------------------------------------
@@ -117,6 +135,7 @@ if selected is not None and len(selected) > 0:
             # 종목코드와 종목명을 세션에 저장합니다. (상세 페이지에서 이 코드를 사용해 데이터를 조회)
             st.session_state["selected_stock_code"] = stock_code
             st.session_state["selected_stock_name"] = stock_name
+            prefetch.open_detail(stock_code)
 
             st.success(f"✅ {stock_name} ({stock_code}) 차트 페이지로 이동 중...")
             st.switch_page("pages/stock_detail.py")
@@ -127,3 +146,5 @@ if selected is not None and len(selected) > 0:
         st.error("❌ 선택된 행 데이터에 '종목코드' 또는 '종목명' 키가 존재하지 않습니다. Supabase 쿼리와 컬럼명을 다시 확인해주세요.")
     except Exception as e:
         st.error(f"❌ 페이지 이동 중 오류 발생: {e}")
+
+metrics.page_end()
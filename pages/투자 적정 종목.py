@@ -1,9 +1,8 @@
 # -*- coding: utf-8 -*-
 import streamlit as st
 import pandas as pd
-import os
-from supabase import create_client
-from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode
+from core import db, metrics, prefetch
+from core.b_index import get_b_index
 # (예: pages/한국 돌파 종목.py 파일)
 
 # ----------------------------------------------
@@ -25,14 +24,9 @@ show_app_header()
 # ------------------------------------------------
 # Supabase 연결
 # ------------------------------------------------
-SUPABASE_URL = os.environ.get("SUPABASE_URL") or st.secrets.get("SUPABASE_URL")
-SUPABASE_KEY = os.environ.get("SUPABASE_KEY") or st.secrets.get("SUPABASE_KEY")
-
-if not SUPABASE_URL or not SUPABASE_KEY:
-    st.error("❌ Supabase 환경변수(SUPABASE_URL, SUPABASE_KEY)가 설정되지 않았습니다.")
-    st.stop()
-
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+# ✅ 실행 시간 계측 (?perf=1 이면 페이지 맨 아래에 성능 패널)
+metrics.page_start("투자 적정 종목")
+db.require_client()
 
 # ------------------------------------------------
 # 페이지 설정
@@ -40,40 +34,37 @@ supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
 st.set_page_config(page_title="투자 적정 종목", layout="wide")
 
 st.markdown("<h4 style='text-align:center;'>💰 투자 적정 구간 종목 리스트</h4>", unsafe_allow_html=True)
-st.markdown("<p style='text-align:center; color:gray; font-size:13px;'>현재가격이 b가격 ±5% 이내인 종목입니다. 행을 클릭하면 차트로 이동합니다.</p>", unsafe_allow_html=True)
+st.markdown("<p style='text-align:center; color:gray; font-size:13px;'>현재가격이 b가격 ±범위 이내인 종목입니다. 행을 클릭하면 차트로 이동합니다.</p>", unsafe_allow_html=True)
 st.markdown("---")
 
+# ✅ 범위 선택 (색인에서 바로 조회하므로 슬라이더를 움직여도 다시 불러오지 않음)
+band_pct = st.slider("b가격 대비 범위 (±%)", min_value=1.0, max_value=20.0, value=5.0, step=0.5)
+
 # ------------------------------------------------
 # 데이터 로딩
 # ------------------------------------------------
-@st.cache_data(ttl=300)
-def load_via_join():
+def load_via_join(band_pct):
     try:
-        bt = supabase.table("bt_points").select("종목코드, b가격").execute()
-        tt = supabase.table("total_return").select("종목명, 종목코드, 현재가격").execute()
-
-        df_b = pd.DataFrame(bt.data)
-        df_t = pd.DataFrame(tt.data)
-        if df_b.empty or df_t.empty:
-            return pd.DataFrame()
-
-        df = pd.merge(df_b, df_t, on="종목코드", how="inner")
-        df["변동률"] = ((df["현재가격"] - df["b가격"]) / df["b가격"] * 100).round(2)
-        df = df[(df["현재가격"] >= df["b가격"] * 0.95) & (df["현재가격"] <= df["b가격"] * 1.05)]
-        df = df.sort_values("변동률", ascending=True)
-        return df[["종목명", "종목코드", "b가격", "현재가격", "변동률"]]
+        return get_b_index().within(band_pct)
     except Exception as e:
-        st.error(f"❌ 데이터 병합 중 오류: {e}")
-        return pd.DataFrame()
+        # 색인을 만들 수 없으면 DB 필터링 결과로 대체
+        try:
+            return db.load_b_zone_candidates(band_pct)
+        except Exception:
+            st.error(f"❌ 데이터 병합 중 오류: {e}")
+            return pd.DataFrame()
 
-df = load_via_join()
+df = load_via_join(band_pct)
 if df.empty:
-    st.warning("⚠️ 현재 b가격 ±5% 이내의 종목이 없습니다.")
+    st.warning(f"⚠️ 현재 b가격 ±{band_pct:g}% 이내의 종목이 없습니다.")
     st.stop()
 
 # ------------------------------------------------
 # AgGrid 설정
 # ------------------------------------------------
+# ✅ st_aggrid 는 표를 그릴 때 import (데이터가 없어 st.stop 되면 불러오지 않음)
+from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode
+
 gb = GridOptionsBuilder.from_dataframe(df)
 gb.configure_default_column(resizable=True, sortable=True, filter=True)
 gb.configure_selection(selection_mode="single", use_checkbox=False)
@@ -90,6 +81,9 @@ grid_response = AgGrid(
     height=600,
 )
 
+# ✅ (선택 기능) 화면 위쪽 종목의 차트 데이터를 미리 받아 둔다
+prefetch.warm_listing(df)
+
 selected = grid_response.get("selected_rows")
 
 # ------------------------------------------------
@@ -107,9 +101,12 @@ if selected is not None:
 
         st.session_state["selected_stock_name"] = stock_name
         st.session_state["selected_stock_code"] = stock_code
+        prefetch.open_detail(stock_code)
 
         st.success(f"✅ {stock_name} 차트 페이지로 이동 중...")
         st.switch_page("pages/stock_detail.py")
 
 st.markdown("---")
-st.caption("💡 b가격 ±5% 구간에 위치한 종목은 매수/매도 균형 구간으로 해석할 수 있습니다.")
+st.caption(f"💡 b가격 ±{band_pct:g}% 구간에 위치한 종목은 매수/매도 균형 구간으로 해석할 수 있습니다.")
+
+metrics.page_end()
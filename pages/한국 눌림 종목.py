@@ -1,20 +1,13 @@
 # -*- coding: utf-8 -*-
 import streamlit as st
-import pandas as pd
-import os
-from supabase import create_client
+from core import db, metrics, snapshots
 
 # ------------------------------------------------
 # 환경 변수 및 Supabase 연결 (Render + Streamlit Cloud 겸용)
 # ------------------------------------------------
-SUPABASE_URL = os.environ.get("SUPABASE_URL") or st.secrets.get("SUPABASE_URL")
-SUPABASE_KEY = os.environ.get("SUPABASE_KEY") or st.secrets.get("SUPABASE_KEY")
-
-if not SUPABASE_URL or not SUPABASE_KEY:
-    st.error("❌ Supabase 환경변수(SUPABASE_URL, SUPABASE_KEY)가 설정되지 않았습니다.")
-    st.stop()
-
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+# ✅ 실행 시간 계측 (?perf=1 이면 페이지 맨 아래에 성능 패널)
+metrics.page_start("한국 눌림 종목")
+db.require_client()
 
 # ------------------------------------------------
 # 페이지 설정
@@ -28,16 +21,8 @@ st.markdown("---")
 # ------------------------------------------------
 # 데이터 로딩
 # ------------------------------------------------
-@st.cache_data(ttl=300)
 def load_b_return():
-    query = (
-        supabase.table("b_return")
-        .select("종목명, 종목코드, 수익률, 발생일, 구분")
-        .order("수익률", desc=True)
-        .limit(1000)
-    )
-    res = query.execute()
-    return pd.DataFrame(res.data)
+    return snapshots.get(db.load_b_return, limit=1000)
 
 df = load_b_return()
 
@@ -48,7 +33,6 @@ if df.empty:
 # ------------------------------------------------
 # 수익률 정렬 및 표시
 # ------------------------------------------------
-df["수익률"] = df["수익률"].astype(float)
 df_sorted = df.sort_values("수익률", ascending=False).reset_index(drop=True)
 
 # 포맷 조정
@@ -65,3 +49,5 @@ st.dataframe(
 # ------------------------------------------------
 st.markdown("---")
 st.caption("💡 이 페이지는 Supabase의 b_return 데이터를 실시간으로 불러옵니다. (5분 캐시)")
+
+metrics.page_end()
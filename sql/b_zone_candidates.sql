@@ -0,0 +1,33 @@
+-- ------------------------------------------------
+-- 투자 적정 구간 종목 (현재가격이 b가격 ±band_pct% 이내)
+-- Supabase SQL Editor 에서 한 번 실행하면 core.db.load_b_zone_candidates() 가
+-- RPC(b_zone_candidates)로 일치하는 행만 받아온다. 없으면 pandas 병합으로 대체된다.
+-- ------------------------------------------------
+create or replace function b_zone_candidates(band_pct double precision default 5)
+returns table (
+    "종목명" text,
+    "종목코드" text,
+    "b가격" double precision,
+    "현재가격" double precision,
+    "변동률" double precision
+)
+language sql
+stable
+as $$
+    select
+        t."종목명"::text,
+        t."종목코드"::text,
+        b."b가격"::double precision,
+        t."현재가격"::double precision,
+        round(((t."현재가격" - b."b가격") / b."b가격" * 100)::numeric, 2)::double precision
+    from bt_points b
+    join total_return t on t."종목코드" = b."종목코드"
+    where b."b가격" > 0
+      and t."현재가격" between b."b가격" * (1 - band_pct / 100) and b."b가격" * (1 + band_pct / 100)
+    -- range() 로 나눠 받으므로 변동률이 같은 행도 순서가 고정되게 한다
+    order by 5 asc, t."종목코드", b."b가격";
+$$;
+
+-- 조인 키 인덱스
+create index if not exists idx_bt_points_code on bt_points ("종목코드");
+create index if not exists idx_total_return_code on total_return ("종목코드");
@@ -0,0 +1,50 @@
+-- ------------------------------------------------
+-- 테이블별 데이터 버전 (core.versions 가 읽는다)
+-- 테이블에 insert/update/delete/truncate 가 있을 때마다 version 이 1씩 올라간다.
+-- 문장 단위 트리거라 야간 배치가 몇만 행을 써도 버전 갱신은 문장당 한 번.
+-- 한 번 실행해 두면 로더는 버전이 바뀐 테이블만 다시 받는다. 없으면 TTL 만료만 사용.
+-- ------------------------------------------------
+create table if not exists data_versions (
+    table_name text primary key,
+    version bigint not null default 0,
+    updated_at timestamptz not null default now()
+);
+
+create or replace function bump_data_version()
+returns trigger
+language plpgsql
+as $$
+begin
+    insert into data_versions (table_name, version, updated_at)
+    values (TG_TABLE_NAME, 1, now())
+    on conflict (table_name)
+    do update set version = data_versions.version + 1, updated_at = now();
+    return null;
+end;
+$$;
+
+do $$
+declare
+    t text;
+begin
+    foreach t in array array[
+        'total_return', 'bt_points', 'prices',
+        'b_return', 'b_return_shoot', 'b_zone_monthly_tracking'
+    ]
+    loop
+        execute format('drop trigger if exists %I on %I', 'bump_version_' || t, t);
+        execute format(
+            'create trigger %I after insert or update or delete or truncate on %I '
+            'for each statement execute function bump_data_version()',
+            'bump_version_' || t, t
+        );
+        insert into data_versions (table_name, version) values (t, 0)
+        on conflict (table_name) do nothing;
+    end loop;
+end;
+$$;
+
+-- anon 키로 읽을 수 있도록 (RLS 사용 시)
+alter table data_versions enable row level security;
+drop policy if exists "data_versions read" on data_versions;
+create policy "data_versions read" on data_versions for select using (true);
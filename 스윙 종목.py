@@ -1,8 +1,7 @@
 # -*- coding: utf-8 -*-
 import streamlit as st
 import pandas as pd
-import os
-from supabase import create_client
+from core import db, metrics, ranking
 from header import show_app_header
 
 # ----------------------------------------------
@@ -16,14 +15,9 @@ show_app_header()
 # ------------------------------------------------
 # 환경 변수 및 Supabase 연결
 # ------------------------------------------------
-SUPABASE_URL = os.environ.get("SUPABASE_URL") or st.secrets.get("SUPABASE_URL")
-SUPABASE_KEY = os.environ.get("SUPABASE_KEY") or st.secrets.get("SUPABASE_KEY")
-
-if not SUPABASE_URL or not SUPABASE_KEY:
-    st.error("❌ Supabase 환경변수(SUPABASE_URL, SUPABASE_KEY)가 설정되지 않았습니다.")
-    st.stop()
-
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+# ✅ 실행 시간 계측 (?perf=1 이면 페이지 맨 아래에 성능 패널)
+metrics.page_start("스윙 종목")
+db.require_client()
 
 # ------------------------------------------------
 # 페이지 설정
@@ -39,35 +33,23 @@ st.markdown("<p style='text-align:center; font-size:13px; color:gray; margin-top
 st.markdown("---")
 
 # ------------------------------------------------
-# 데이터 로딩 (종목명, 수익률만 불러오기)
+# 데이터 로딩 (상위 5개 / 하위 5개만 DB 에서 바로 조회)
 # ------------------------------------------------
-@st.cache_data(ttl=300)
-def load_returns():
+def load_top_bottom(category, k=5):
     try:
-        query = (
-            supabase.table("total_return")
-            .select("종목명, 수익률")
-            .order("수익률", desc=True)
-            .limit(5000)
-        )
-        res = query.execute()
-        return pd.DataFrame(res.data)
+        return ranking.load_top_bottom(category, k)
     except Exception as e:
         st.error(f"❌ Supabase 쿼리 오류 발생: {e}")
-        return pd.DataFrame()
+        return pd.DataFrame(), pd.DataFrame()
 
-df_all = load_returns()
-if df_all.empty:
+domestic_top5, domestic_bottom5 = load_top_bottom("스윙", 5)
+if domestic_top5.empty:
     st.warning("⚠️ Supabase의 total_return 테이블에 데이터가 없습니다.")
     st.stop()
 
 # ------------------------------------------------
 # 데이터 구성
 # ------------------------------------------------
-df_all["수익률"] = df_all["수익률"].astype(float)
-domestic_top5 = df_all.sort_values("수익률", ascending=False).head(5).reset_index(drop=True)
-domestic_bottom5 = df_all.sort_values("수익률", ascending=True).head(5).reset_index(drop=True)
-
 foreign_top5 = pd.DataFrame({
     "종목명": ["Apple", "Nvidia", "Microsoft", "Tesla", "Amazon"],
     "수익률": [15.4, 13.2, 11.8, 10.6, 9.9]
@@ -123,5 +105,4 @@ st.markdown(cards_html, unsafe_allow_html=True)
 st.markdown("---")
 st.caption("💡 상단 스크롤 네비게이션으로 페이지를 선택하세요. (모바일에서도 좌우 스크롤 가능)")
 
-
-
+metrics.page_end()